@@ -0,0 +1,321 @@
+"""ASGI entry point for the Enhanced Chatbot API.
+
+Serves the same routes as the Flask app in enhanced_chatbot.py, on an
+asyncio-native stack with no web framework in between:
+
+    uvicorn asgi_app:app --host 0.0.0.0 --port 8000    # production-grade server
+    python asgi_app.py [port]                          # same thing, via uvicorn
+
+Handlers are CPU-only and take microseconds, so they run directly on the
+event loop instead of being offloaded to a thread pool.
+"""
+import json
+import re
+import sys
+import types
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qsl
+
+from enhanced_chatbot import (
+    ADMIN_TOKEN_HEADER, DEFAULT_SCOPE, MAX_BODY_BYTES, PROMETHEUS_CONTENT_TYPE, SESSION_COOKIE, SESSION_HEADER,
+    SSE_CONTENT_TYPE, SSE_HEADERS, admin_authorized, admission, batch_payload, chat_payload, chat_stream_payload,
+    chatbot, context_payload, error_payload, etag_matches, health_payload, metrics_text, profile_not_found_payload,
+    profiles, profiling_payload, reasoning_requested, reset_payload, resolve_session_id, server_error_payload,
+    shed_payload, start_config_watcher
+)
+
+PROFILE_ROUTE = re.compile(r"^/api/([^/]+)/(chat|chat/stream|chat/batch|profile|context|reset)$")
+PROFILE_ACTIONS = {"chat/stream": "stream", "chat/batch": "batch"}
+CORS_HEADERS = [
+    (b"access-control-allow-origin", b"*"),
+]
+
+# --- Request Helpers ---
+class Request:
+    """The parts of an ASGI HTTP request the handlers need"""
+
+    def __init__(self, scope, body):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.args = dict(parse_qsl(scope.get("query_string", b"").decode("latin-1")))
+        self.headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]}
+        self.body = body
+        cookies = SimpleCookie()
+        try:
+            cookies.load(self.headers.get("cookie", ""))
+        except Exception:
+            pass
+        self.cookies = {name: morsel.value for name, morsel in cookies.items()}
+
+    def json(self):
+        """Parsed JSON body, or None when absent or malformed"""
+        try:
+            return json.loads(self.body) if self.body else None
+        except ValueError:
+            return None
+
+    def session_id(self, data=None):
+        return resolve_session_id(
+            data,
+            self.headers.get(SESSION_HEADER.lower()),
+            self.args.get("session_id"),
+            self.cookies.get(SESSION_COOKIE)
+        )
+
+async def read_body(receive):
+    """Read the whole request body; returns None if it exceeds MAX_BODY_BYTES"""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return b""
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+def add_session_cookie(headers, session):
+    """Issue the session cookie when `session` is (session_id, True)"""
+    if session is not None and session[1]:
+        cookie = f"{SESSION_COOKIE}={session[0]}; HttpOnly; Path=/; SameSite=Lax"
+        headers.append((b"set-cookie", cookie.encode("latin-1")))
+    return headers
+
+async def send_json(send, payload, status=200, session=None, extra_headers=()):
+    """Send a JSON response; `session` is (session_id, is_new) to issue the cookie"""
+    body = json.dumps(payload).encode("utf-8")
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode("latin-1")),
+    ] + CORS_HEADERS + list(extra_headers)
+    await send({"type": "http.response.start", "status": status, "headers": add_session_cookie(headers, session)})
+    await send({"type": "http.response.body", "body": body})
+
+async def send_stream(send, events, session=None):
+    """Send SSE-encoded events as they are produced, one body chunk each"""
+    headers = [(b"content-type", SSE_CONTENT_TYPE.encode("latin-1"))] + CORS_HEADERS + [
+        (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in SSE_HEADERS.items()
+    ]
+    await send({"type": "http.response.start", "status": 200, "headers": add_session_cookie(headers, session)})
+    for chunk in events:
+        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+async def send_text(send, text, content_type):
+    body = text.encode("utf-8")
+    headers = [
+        (b"content-type", content_type.encode("latin-1")),
+        (b"content-length", str(len(body)).encode("latin-1")),
+    ] + CORS_HEADERS
+    await send({"type": "http.response.start", "status": 200, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+async def send_profile(send, request, bot):
+    """Send the pre-rendered profile JSON with an ETag, or 304 if the client has it"""
+    tables = bot.tables
+    headers = [(b"etag", f'"{tables.profile_etag}"'.encode("latin-1"))] + CORS_HEADERS
+    if etag_matches(request.headers.get("if-none-match"), tables.profile_etag):
+        await send({"type": "http.response.start", "status": 304, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
+        return
+    body = tables.profile_json
+    headers += [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode("latin-1")),
+    ]
+    await send({"type": "http.response.start", "status": 200, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+def without_body(send):
+    """Wrap `send` so a HEAD request gets the GET response's status and headers, but no body"""
+    async def send_headers(message):
+        if message["type"] == "http.response.body":
+            if message.get("more_body"):
+                return
+            message = {"type": "http.response.body", "body": b""}
+        await send(message)
+    return send_headers
+
+async def send_preflight(send, request):
+    """Answer a CORS preflight the way flask_cors does with its defaults"""
+    headers = CORS_HEADERS + [
+        (b"access-control-allow-methods", b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"),
+    ]
+    requested = request.headers.get("access-control-request-headers")
+    if requested:
+        headers.append((b"access-control-allow-headers", requested.encode("latin-1")))
+    await send({"type": "http.response.start", "status": 200, "headers": headers})
+    await send({"type": "http.response.body", "body": b""})
+
+# --- Routing ---
+def dispatch(request, bot, action, scope=DEFAULT_SCOPE):
+    """Run one route; returns (payload, status, session or None).
+
+    A bot (instead of a payload) is returned for GET profile, which is served
+    from pre-rendered bytes by send_profile, and a generator of SSE chunks for
+    a streamed chat.
+    """
+    if action == "chat" and request.method == "POST":
+        data = request.json()
+        session = request.session_id(data)
+        payload, status = chat_payload(bot, data, session[0], scope, reasoning_requested(data, request.args))
+        return payload, status, session if status == 200 else None
+    if action == "stream" and request.method == "POST":
+        data = request.json()
+        session = request.session_id(data)
+        payload, status = chat_stream_payload(bot, data, session[0], scope,
+                                              reasoning_requested(data, request.args, True))
+        return payload, status, session if status == 200 else None
+    if action == "batch" and request.method == "POST":
+        data = request.json()
+        # Only a session the caller already has is continued; otherwise the batch is stateless
+        session_id, is_new = request.session_id(data)
+        payload, status = batch_payload(bot, data, None if is_new else session_id, scope,
+                                        reasoning_requested(data, request.args))
+        return payload, status, None
+    if action == "profile" and request.method == "GET":
+        return bot, 200, None
+    if action == "context" and request.method == "GET":
+        session = request.session_id()
+        payload, status = context_payload(bot, session[0], scope)
+        return payload, status, session
+    if action == "reset" and request.method == "POST":
+        session = request.session_id(request.json())
+        payload, status = reset_payload(bot, session[0], scope)
+        return payload, status, session
+    return error_payload("Method not allowed"), 405, None
+
+STATIC_ROUTES = {
+    "/api/chat": "chat",
+    "/api/chat/stream": "stream",
+    "/api/chat/batch": "batch",
+    "/api/profile": "profile",
+    "/api/context": "context",
+    "/api/reset": "reset",
+}
+
+def route(request):
+    if request.path == "/api/health":
+        payload, status = health_payload()
+        return payload, status, None
+    if request.path == "/api/metrics/cprofile":
+        if not admin_authorized(request.headers.get(ADMIN_TOKEN_HEADER.lower())):
+            return error_payload("Forbidden"), 403, None
+        if request.method == "POST":
+            payload, status = profiling_payload(request.json())
+            return payload, status, None
+    action = STATIC_ROUTES.get(request.path)
+    if action is not None:
+        return dispatch(request, chatbot, action)
+    match = PROFILE_ROUTE.match(request.path)
+    if match:
+        profile_id, action = match.groups()
+        action = PROFILE_ACTIONS.get(action, action)
+        bot = profiles.get(profile_id)
+        if bot is None:
+            payload, status = profile_not_found_payload(profile_id)
+            return payload, status, None
+        return dispatch(request, bot, action, f"{profile_id}:")
+    return error_payload("Not found"), 404, None
+
+ADMITTED_ACTIONS = frozenset(["chat", "chat/stream", "chat/batch", "stream", "batch"])
+
+def admission_required(method, path):
+    """Chat requests go through admission control; the other routes are cheap and always served"""
+    if method != "POST":
+        return False
+    action = STATIC_ROUTES.get(path)
+    if action is None:
+        match = PROFILE_ROUTE.match(path)
+        action = match.group(2) if match else None
+    return action in ADMITTED_ACTIONS
+
+# --- ASGI Application ---
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                start_config_watcher()
+            except Exception as e:
+                # Refuse to start rather than silently serving the built-in profile
+                await send({"type": "lifespan.startup.failed", "message": f"Config load failed: {e}"})
+                return
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def app(scope, receive, send):
+    """ASGI callable exposing the chat API"""
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    if not admission_required(scope["method"], scope["path"]):
+        await serve(scope, receive, send)
+        return
+    # Shed before the body is even read, so an overloaded server answers quickly
+    client = scope.get("client")
+    shed = shed_payload(client[0] if client else None)
+    if shed is not None:
+        payload, status, retry_after = shed
+        await send_json(send, payload, status, extra_headers=[(b"retry-after", str(retry_after).encode("latin-1"))])
+        return
+    try:
+        await serve(scope, receive, send)
+    finally:
+        admission.release()
+
+async def serve(scope, receive, send):
+    """Read, route and answer one HTTP request"""
+    body = await read_body(receive)
+    if body is None:
+        await send_json(send, error_payload("Request body too large"), 413)
+        return
+
+    request = Request(scope, body)
+    if request.method == "HEAD":
+        # Answered as a GET without the body, like Flask
+        request.method = "GET"
+        send = without_body(send)
+    if request.method == "OPTIONS":
+        await send_preflight(send, request)
+        return
+
+    if request.method == "GET" and request.path == "/api/metrics":
+        await send_text(send, metrics_text(), PROMETHEUS_CONTENT_TYPE)
+        return
+    if request.method == "GET" and request.path == "/api/metrics/cprofile" \
+            and admin_authorized(request.headers.get(ADMIN_TOKEN_HEADER.lower())):
+        await send_text(send, chatbot.profiler.report(), "text/plain; charset=utf-8")
+        return
+
+    try:
+        payload, status, session = route(request)
+    except Exception as e:
+        payload, status, session = server_error_payload(e), 500, None
+    if isinstance(payload, dict):
+        await send_json(send, payload, status, session)
+    elif isinstance(payload, types.GeneratorType):
+        await send_stream(send, payload, session)
+    else:
+        await send_profile(send, request, payload)
+
+if __name__ == "__main__":
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("uvicorn is required to serve the ASGI app (pip install uvicorn)")
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    print("🚀 Starting Enhanced Chatbot ASGI Server...")
+    print(f"Profile: {chatbot.profile['name']} - {chatbot.profile['role']}")
+    print("=" * 50)
+    uvicorn.run(app, host="0.0.0.0", port=port, log_level="warning", access_log=False)
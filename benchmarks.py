@@ -0,0 +1,890 @@
+"""Microbenchmarks and the performance regression suite for the Enhanced Chatbot engine.
+
+Usage:
+    python benchmarks.py                              # run every microbenchmark
+    python benchmarks.py matcher                      # run a single benchmark by name
+    python benchmarks.py regression                   # compare against benchmarks_baseline.json
+    python benchmarks.py regression --update-baseline # record a new baseline
+"""
+import argparse
+import json
+import os
+import random
+import re
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from chatbot_core import (
+    INTENT_RULES, PROFILE, AdmissionController, ConfigWatcher, EnhancedChatBot, FuzzyIndex, IntentMatcher,
+    IntentTransitions, MemorySessionStore, ProfileRegistry, QuestionHistory, TfidfScorer, TokenBucketLimiter,
+    TranscriptLog, export_config, replay_transcript
+)
+from enhanced_chatbot import app
+
+# --- Sample Queries ---
+SAMPLE_MESSAGES = [
+    "Hello there!",
+    "hi",
+    "Who are you?",
+    "Tell me about yourself",
+    "What do you do for a living?",
+    "What are your skills and technologies?",
+    "Which programming languages and technical skills do you have?",
+    "Where did you study? Which university and degree?",
+    "Tell me about your work experience and career background",
+    "Show me your projects and portfolio",
+    "What are your hobbies and personal interests?",
+    "What are you currently working on?",
+    "How can I contact you to hire for freelance work?",
+    "What are your career goals and future plans?",
+    "Which tools and software do you use?",
+    "Where are you based? Which country are you from?",
+    "Do you have any certifications or credentials?",
+    "Share your LinkedIn and GitHub profile",
+    "Goodbye, see you later",
+    "What's the weather like on Mars?",
+    "asdfghjkl",
+    "Héllo, qualifications ſkills?",
+]
+
+
+def legacy_best(message):
+    """Reference implementation: one re.search per pattern, as detect_intent used to do"""
+    normalized_message = message.lower().strip()
+    best_intent = "fallback"
+    max_score = 0
+    matched_patterns = []
+    extracted_entities = []
+    for intent, config in INTENT_RULES.items():
+        score = 0
+        intent_matches = []
+        for pattern in config["patterns"]:
+            if re.search(pattern, normalized_message, re.IGNORECASE):
+                score += config["weight"]
+                intent_matches.append(pattern)
+        if score > max_score:
+            max_score = score
+            best_intent = intent
+            matched_patterns = intent_matches
+            extracted_entities = config["entities"]
+    return best_intent, max_score, matched_patterns, extracted_entities
+
+
+def timeit(func, messages, rounds):
+    """Return mean microseconds per call of func over messages"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for message in messages:
+            func(message)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(messages)) * 1e6
+
+
+# --- Benchmarks ---
+def bench_matcher(rounds=2000):
+    """Per-message intent matching cost: per-pattern re.search vs IntentMatcher (uncached)"""
+    matcher = IntentMatcher(INTENT_RULES, cache_size=0)
+
+    def compiled_best(message):
+        return matcher.best(message.lower().strip())
+
+    for message in SAMPLE_MESSAGES:
+        expected, actual = legacy_best(message), compiled_best(message)
+        if expected != actual:
+            raise AssertionError(f"Matcher mismatch for {message!r}: {expected} != {actual}")
+
+    before = timeit(legacy_best, SAMPLE_MESSAGES, rounds)
+    after = timeit(compiled_best, SAMPLE_MESSAGES, rounds)
+    print(f"matcher: re.search loop {before:.2f}us/msg, IntentMatcher {after:.2f}us/msg "
+          f"({before / after:.1f}x faster)")
+
+
+def bench_sessions(visitors=50000, max_sessions=5000):
+    """Memory held by the session store when many short-lived visitors arrive"""
+    chatbot = EnhancedChatBot(PROFILE, sessions=MemorySessionStore(max_sessions=max_sessions))
+    tracemalloc.start()
+    checkpoints = []
+    for visitor in range(1, visitors + 1):
+        session_id = f"visitor-{visitor}"
+        chatbot.process_message("hi", session_id)
+        chatbot.process_message("What are your skills?", session_id)
+        if visitor % (visitors // 5) == 0:
+            checkpoints.append((visitor, tracemalloc.get_traced_memory()[0] / 1e6))
+    tracemalloc.stop()
+    trace = ", ".join(f"{count}: {mb:.1f}MB" for count, mb in checkpoints)
+    print(f"sessions: {len(chatbot.sessions)} live of {visitors} visitors; traced memory {trace}")
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def bench_memory(messages=1000000):
+    """Peak RSS while one long-lived session receives `messages` messages"""
+    chatbot = EnhancedChatBot(PROFILE)
+    checkpoints = []
+    start = time.perf_counter()
+    for i in range(1, messages + 1):
+        chatbot.process_message(SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)], "long-lived")
+        if i % (messages // 4) == 0:
+            checkpoints.append((i, peak_rss_mb()))
+    elapsed = time.perf_counter() - start
+    trace = ", ".join(f"{count}: {mb:.1f}MB" for count, mb in checkpoints)
+    print(f"memory: {messages} messages in {elapsed:.1f}s; peak RSS {trace}")
+
+
+def bench_batch(messages=1000):
+    """Sequential /api/chat calls vs one /api/chat/batch call through Flask's test client"""
+    client = app.test_client()
+    corpus = [SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)] for i in range(messages)]
+
+    start = time.perf_counter()
+    for message in corpus:
+        client.post("/api/chat", json={"message": message, "session_id": "bench-sequential"})
+    sequential = messages / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    response = client.post("/api/chat/batch", json={"messages": corpus, "include_reasoning": False})
+    batched = messages / (time.perf_counter() - start)
+    assert response.status_code == 200 and response.get_json()["count"] == messages
+
+    print(f"batch: sequential /api/chat {sequential:,.0f} msg/s, /api/chat/batch {batched:,.0f} msg/s "
+          f"({batched / sequential:.1f}x)")
+
+
+def percentiles(samples_ns):
+    """Return (p50, p99) in microseconds"""
+    ordered = sorted(samples_ns)
+    return ordered[len(ordered) // 2] / 1e3, ordered[int(len(ordered) * 0.99)] / 1e3
+
+
+def bench_reasoning(messages=20000):
+    """p50/p99 latency with chain-of-thought on and off, in the engine and over /api/chat"""
+    chatbot = EnhancedChatBot(PROFILE)
+    client = app.test_client()
+    corpus = [SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)] for i in range(messages)]
+
+    for include_reasoning in (True, False):
+        samples = []
+        for message in corpus:
+            start = time.perf_counter_ns()
+            chatbot.process_message(message, "bench", include_reasoning)
+            samples.append(time.perf_counter_ns() - start)
+        p50, p99 = percentiles(samples)
+
+        http_samples = []
+        for message in corpus[:messages // 10]:
+            start = time.perf_counter_ns()
+            client.post("/api/chat", json={"message": message, "session_id": "bench",
+                                           "include_reasoning": include_reasoning})
+            http_samples.append(time.perf_counter_ns() - start)
+        http_p50, http_p99 = percentiles(http_samples)
+
+        print(f"reasoning {'on ' if include_reasoning else 'off'}: process_message p50 {p50:.1f}us p99 {p99:.1f}us; "
+              f"/api/chat p50 {http_p50:.1f}us p99 {http_p99:.1f}us")
+
+
+def bench_stream(messages=2000):
+    """Time to first body byte, total time and body bytes: /api/chat vs /api/chat/stream (ASGI, in-process)"""
+    import asyncio
+    from asgi_app import app as asgi
+
+    async def call(path, body):
+        pending = [{"type": "http.request", "body": body, "more_body": False}]
+        timings = []
+        size = 0
+
+        async def receive():
+            return pending.pop() if pending else {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal size
+            if message["type"] == "http.response.body" and message.get("body"):
+                size += len(message["body"])
+                if not timings:
+                    timings.append(time.perf_counter_ns())
+
+        start = time.perf_counter_ns()
+        await asgi({"type": "http", "method": "POST", "path": path, "query_string": b"",
+                    "headers": [(b"content-type", b"application/json")]}, receive, send)
+        return timings[0] - start, time.perf_counter_ns() - start, size
+
+    async def run(path, include_reasoning):
+        first, total, sizes = [], [], []
+        for i in range(messages):
+            body = json.dumps({"message": SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)], "session_id": "bench-stream",
+                               "include_reasoning": include_reasoning}).encode("utf-8")
+            ttfb, elapsed, size = await call(path, body)
+            first.append(ttfb)
+            total.append(elapsed)
+            sizes.append(size)
+        return percentiles(first)[0], percentiles(total)[0], sum(sizes) / len(sizes)
+
+    for include_reasoning in (True, False):
+        for path in ("/api/chat", "/api/chat/stream"):
+            ttfb, total, size = asyncio.run(run(path, include_reasoning))
+            print(f"stream: {path:<17} reasoning {'on ' if include_reasoning else 'off'}: "
+                  f"p50 first byte {ttfb:.1f}us, complete {total:.1f}us, {size:,.0f} bytes/message")
+
+
+def bench_reload(poll_interval=0.01):
+    """Hot reload of the config file: reload time and request latency while it happens"""
+    chatbot = EnhancedChatBot(PROFILE)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "profile.json")
+        export_config(path)
+        watcher = ConfigWatcher(path, chatbot, poll_interval=poll_interval).start()
+        samples = []  # (start_ns, latency_ns)
+        stop = threading.Event()
+
+        def traffic():
+            i = 0
+            while not stop.is_set():
+                start = time.perf_counter_ns()
+                chatbot.process_message(SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)], "reload", False)
+                samples.append((start, time.perf_counter_ns() - start))
+                i += 1
+
+        worker = threading.Thread(target=traffic)
+        worker.start()
+        time.sleep(0.5)
+
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        config["intent_rules"]["skills"]["patterns"].append("skillset")
+        config["profile"]["role"] = "Senior Data Analyst"
+        old_tables = chatbot.tables
+        changed_at = time.perf_counter_ns()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(config, f)
+        while chatbot.tables is old_tables:
+            time.sleep(poll_interval / 10)
+        swapped_at = time.perf_counter_ns()
+
+        time.sleep(0.5)
+        stop.set()
+        worker.join()
+        watcher.stop()
+
+    assert chatbot.detect_intent("show me your skillset", False)["intent"] == "skills"
+    assert chatbot.profile["role"] == "Senior Data Analyst"
+
+    baseline = [latency for start, latency in samples if start < changed_at]
+    during = [latency for start, latency in samples if start + latency >= changed_at and start <= swapped_at] or [0]
+    _, baseline_p99 = percentiles(baseline)
+    print(f"reload: rebuilt in {watcher.last_reload_seconds * 1000:.2f}ms "
+          f"(file change to swap {(swapped_at - changed_at) / 1e6:.1f}ms with {poll_interval * 1000:.0f}ms polling); "
+          f"request p99 {baseline_p99:.1f}us before, max {max(during) / 1e3:.1f}us during reload")
+
+
+def current_rss_mb():
+    """Current resident set size in MB (Linux only; falls back to the peak elsewhere)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        return peak_rss_mb()
+
+
+def bench_tenancy(profiles=1000):
+    """Process RSS with `profiles` portfolio bots loaded behind one shared matcher"""
+    def loader(profile_id):
+        return dict(PROFILE, name=f"Person {profile_id}", role=f"Analyst #{profile_id}")
+
+    matcher = IntentMatcher(INTENT_RULES)
+    registry = ProfileRegistry(loader, matcher=matcher, sessions=MemorySessionStore(), max_profiles=profiles)
+    before = current_rss_mb()
+    start = time.perf_counter()
+    for i in range(profiles):
+        profile_id = f"p{i}"
+        registry.get(profile_id).process_message("Who are you?", f"{profile_id}:visitor", False)
+    elapsed = time.perf_counter() - start
+    after = current_rss_mb()
+
+    shared = all(registry.get(f"p{i}").matcher is matcher for i in range(profiles))
+    print(f"tenancy: {len(registry)} profiles loaded in {elapsed:.2f}s; RSS {before:.1f}MB -> {after:.1f}MB "
+          f"({(after - before) * 1024 / profiles:.1f}KB/profile, shared matcher: {shared})")
+
+
+def bench_cache(rounds=2000):
+    """Intent matching with the memoization cache on repeated questions, plus /api/profile 304s"""
+    uncached = IntentMatcher(INTENT_RULES, cache_size=0)
+    cached = IntentMatcher(INTENT_RULES)
+    normalized = [message.lower().strip() for message in SAMPLE_MESSAGES]
+    before = timeit(uncached.best, normalized, rounds)
+    after = timeit(cached.best, normalized, rounds)
+    stats = cached.cache.stats()
+
+    client = app.test_client()
+    etag = client.get("/api/profile").headers["ETag"]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        client.get("/api/profile")
+    full = (time.perf_counter() - start) / rounds * 1e6
+    start = time.perf_counter()
+    for _ in range(rounds):
+        assert client.get("/api/profile", headers={"If-None-Match": etag}).status_code == 304
+    conditional = (time.perf_counter() - start) / rounds * 1e6
+
+    print(f"cache: uncached {before:.2f}us/msg, cached {after:.2f}us/msg "
+          f"(hit rate {stats['hit_rate']:.1%}); /api/profile {full:.0f}us, 304 {conditional:.0f}us")
+
+
+# Misspelled questions and the intent the typo-tolerant pass must recover
+TYPO_INTENTS = {
+    "what are your skils": "skills",
+    "which univeristy did you attend": "education",
+    "show me your porfolio": "projects",
+    "how can i contcat you": "contact",
+    "any certifcations?": "certifications",
+    "what is your profesional experiance": "experience",
+    "where were you educated": "fallback",
+    "i love this form": "fallback",
+    "asdfghjkl": "fallback",
+}
+
+
+def bench_fuzzy(rounds=500, vocabulary=20000):
+    """Typo recovery on misspelled questions, and FuzzyIndex lookup cost as the vocabulary grows"""
+    matcher = IntentMatcher(INTENT_RULES, cache_size=0)
+    for message, expected in TYPO_INTENTS.items():
+        assert matcher.best(message)[1] == 0 or expected == "fallback", message
+        intent = matcher.best_fuzzy(message)[0]
+        assert intent == expected, f"{message!r}: expected {expected}, got {intent}"
+    messages = list(TYPO_INTENTS)
+    fuzzy = timeit(matcher.best_fuzzy, messages, rounds)
+    exact = timeit(matcher.best, messages, rounds)
+
+    rng = random.Random(7)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = ["".join(rng.choice(letters) for _ in range(rng.randint(5, 12))) for _ in range(vocabulary)]
+    pairs = [(word[:2] + word[3] + word[2] + word[4:], word) for word in words[:1000] if word[2] != word[3]]
+    typos = [typo for typo, _ in pairs]
+    lookups = []
+    for size in (vocabulary // 100, vocabulary // 10, vocabulary):
+        index = FuzzyIndex(words[:1000] + words[1000:size])
+        recovered = sum(index.correct(typo) == word for typo, word in pairs) / len(pairs)
+        lookups.append((size, timeit(index.correct, typos, 1), recovered))
+
+    # A 1000-char message of unknown words: never cached, and capped at MAX_FUZZY_WORDS lookups
+    long_message = " ".join(words[:200])[:1000]
+    long_fuzzy = timeit(matcher.best_fuzzy, [long_message], 20)
+
+    scaling = ", ".join(f"{size:,} words {cost:.1f}us ({recovered:.0%} recovered)" for size, cost, recovered in lookups)
+    print(f"fuzzy: recovered {len(TYPO_INTENTS)} typo queries, exact pass {exact:.2f}us/msg, "
+          f"with corrections {fuzzy:.2f}us/msg; lookup {scaling}")
+    print(f"fuzzy: {len(long_message)}-char unmatched message {long_fuzzy:.0f}us")
+
+
+def bench_semantic(rounds=500, batch=1000):
+    """TF-IDF scoring cost per message (dense and CSR, single and batched) vs the regex path"""
+    matcher = IntentMatcher(INTENT_RULES, cache_size=0)
+    dense = TfidfScorer(INTENT_RULES, dense=True)
+    sparse = TfidfScorer(INTENT_RULES, dense=False)
+    normalized = [message.lower().strip() for message in SAMPLE_MESSAGES]
+    regex = timeit(matcher.best, normalized, rounds)
+    dense_single = timeit(dense.score, normalized, rounds)
+    sparse_single = timeit(sparse.score, normalized, rounds)
+    blended = timeit(lambda text: dense.blend(matcher, text, 0.5), normalized, rounds)
+    cached = IntentMatcher(INTENT_RULES)
+    blended_cached = timeit(lambda text: dense.blend(cached, text, 0.5), normalized, rounds)
+
+    messages = [normalized[i % len(normalized)] + f" #{i}" for i in range(batch)]
+    results = {}
+    for label, scorer in (("dense", dense), ("csr", sparse)):
+        start = time.perf_counter()
+        results[label] = scorer.score_batch(messages)
+        results[label + "_us"] = (time.perf_counter() - start) / batch * 1e6
+    assert abs(results["dense"] - results["csr"]).max() < 1e-9
+
+    print(f"semantic: regex {regex:.2f}us/msg; tf-idf dense {dense_single:.2f}us, csr {sparse_single:.2f}us, "
+          f"blended with rules {blended:.2f}us ({blended_cached:.2f}us cached); batched x{batch} dense {results['dense_us']:.2f}us/msg, "
+          f"csr {results['csr_us']:.2f}us/msg ({len(dense.vocabulary)} terms x {len(dense.intents)} intents)")
+
+
+class SyncTranscript:
+    """Baseline for bench_transcript: write and flush one JSON line per message on the request thread"""
+
+    def __init__(self, path):
+        self._file = open(path, "a", encoding="utf-8")
+
+    def record(self, session_id, intent, confidence, entities, user_input):
+        self._file.write(json.dumps({"event": "message", "ts": time.time(), "session": session_id, "intent": intent,
+                                     "confidence": confidence, "entities": entities, "input": user_input}) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def bench_transcript(messages=20000, sessions=500, expired=600000):
+    """process_message latency without a transcript, with a synchronous one and with TranscriptLog"""
+    corpus = [SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)] for i in range(messages)]
+    with tempfile.TemporaryDirectory() as directory:
+        sync_path = os.path.join(directory, "sync.jsonl")
+        path = os.path.join(directory, "transcript.jsonl")
+        for label, transcript in (("none", None), ("sync write+fsync", SyncTranscript(sync_path)),
+                                  ("TranscriptLog", TranscriptLog(path, fsync=True))):
+            chatbot = EnhancedChatBot(PROFILE, transcript=transcript)
+            samples = []
+            for i, message in enumerate(corpus):
+                start = time.perf_counter_ns()
+                chatbot.process_message(message, f"visitor-{i % sessions}", include_reasoning=False)
+                samples.append(time.perf_counter_ns() - start)
+            if transcript is not None:
+                transcript.close()
+            p50, p99 = percentiles(samples)
+            extra = ""
+            if isinstance(transcript, TranscriptLog):
+                stats = transcript.stats()
+                extra = f" ({stats['written']} written in {stats['batches']} batches, {stats['dropped']} dropped)"
+            print(f"transcript {label}: process_message p50 {p50:.1f}us p99 {p99:.1f}us{extra}")
+
+        # Drop policy: a burst far beyond the queue bound sheds records instead of blocking
+        burst = TranscriptLog(os.path.join(directory, "burst.jsonl"), max_queue=1000)
+        start = time.perf_counter()
+        for i in range(100000):
+            burst.record("burst", "greet", 0.8, [], "hi")
+        enqueue = (time.perf_counter() - start) / 100000 * 1e6
+        burst.close()
+
+        store = MemorySessionStore(max_sessions=sessions * 2)
+        start = time.perf_counter()
+        restored = replay_transcript(path, store)
+        replay = time.perf_counter() - start
+        print(f"transcript burst of 100000: {enqueue:.2f}us/record enqueued, {burst.written} written, "
+              f"{burst.dropped} dropped; replay of {messages} records into {restored} sessions {replay * 1000:.0f}ms")
+
+        # Startup on a long-lived log: a day of expired history before the last few minutes of traffic
+        old_path = os.path.join(directory, "old.jsonl")
+        now = time.time()
+        with open(old_path, "w", encoding="utf-8") as f:
+            for i in range(expired):
+                f.write(json.dumps({"event": "message", "ts": now - 86400 + i * 0.1, "session": f"old-{i % 50000}",
+                                    "intent": "greet", "entities": [], "input": "hello there"}) + "\n")
+            with open(path, encoding="utf-8") as recent:
+                for line in recent:
+                    record = json.loads(line)
+                    record["ts"] = now - 60
+                    f.write(json.dumps(record) + "\n")
+        start = time.perf_counter()
+        restored = replay_transcript(old_path, MemorySessionStore(max_sessions=sessions * 2))
+        replay = time.perf_counter() - start
+        print(f"transcript replay of a {os.path.getsize(old_path) / 1e6:.0f}MB log, {expired} expired records: "
+              f"{restored} sessions in {replay * 1000:.0f}ms")
+
+
+def bench_startup(runs=5):
+    """Cold start from `python -X importtime`: engine only, console (no Flask), web app; cached rule compilation"""
+    import subprocess
+    from chatbot_core import load_matcher, save_matcher
+
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    def cold_start(code, env=None):
+        """Median (wall ms, import ms) over `runs` fresh interpreters"""
+        walls, imports = [], []
+        for _ in range(runs):
+            start = time.perf_counter()
+            completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=here,
+                                       env=dict(os.environ, **(env or {})), capture_output=True, text=True, check=True)
+            walls.append((time.perf_counter() - start) * 1000)
+            # Sum the cumulative time of top-level imports (no indentation in the module column)
+            imports.append(sum(int(line.split("|")[1]) for line in completed.stderr.splitlines()
+                               if line.startswith("import time:") and "|" in line
+                               and not line.split("|")[2].startswith("  ") and line.split("|")[1].strip().isdigit())
+                           / 1000)
+        return sorted(walls)[len(walls) // 2], sorted(imports)[len(imports) // 2]
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache_path = os.path.join(directory, "rules.pickle")
+        save_matcher(IntentMatcher(INTENT_RULES), cache_path)
+        scenarios = [
+            ("engine (import chatbot_core)", "import chatbot_core", None),
+            ("console (import enhanced_chatbot)", "import enhanced_chatbot", None),
+            ("console + CHATBOT_RULES_CACHE", "import enhanced_chatbot", {"CHATBOT_RULES_CACHE": cache_path}),
+            ("web (enhanced_chatbot.app)", "import enhanced_chatbot; enhanced_chatbot.app", None),
+        ]
+        for label, code, env in scenarios:
+            wall, imports = cold_start(code, env)
+            print(f"startup {label}: {wall:.0f}ms process, {imports:.0f}ms in imports")
+
+        def compile_cold():
+            re.purge()
+            IntentMatcher(INTENT_RULES)
+
+        def load_cached():
+            re.purge()
+            load_matcher(INTENT_RULES, cache_path)
+
+        for label, func in (("compile", compile_cold), ("load from cache", load_cached)):
+            start = time.perf_counter()
+            for _ in range(20):
+                func()
+            print(f"startup rules {label}: {(time.perf_counter() - start) / 20 * 1000:.2f}ms")
+
+
+def bench_admission(requests=200000, clients=5000):
+    """Admission control overhead per request, a flooding client, and oversized messages with and without clipping"""
+    admission = AdmissionController(TokenBucketLimiter(5, 20), max_inflight=256, max_message_length=1000)
+    addresses = [f"10.0.{i // 256}.{i % 256}" for i in range(clients)]
+    start = time.perf_counter()
+    for i in range(requests):
+        if admission.admit(addresses[i % clients]) is None:
+            admission.release()
+    per_request = (time.perf_counter() - start) / requests * 1e9
+    print(f"admission admit+release: {per_request:.0f}ns/request over {clients} clients "
+          f"({len(admission.limiter)} buckets tracked)")
+
+    # One client sending 100 requests/second for 10 simulated seconds against a 5/s limit, burst 20
+    flood = TokenBucketLimiter(5, 20)
+    admitted = sum(1 for i in range(1000) if flood.take("flooder", now=i / 100) == 0)
+    print(f"admission flood: {admitted} of 1000 requests admitted (5/s for 10s plus a burst of 20: ~70)")
+
+    chatbot = EnhancedChatBot(PROFILE)
+    huge = " ".join(SAMPLE_MESSAGES) * 400
+    for label, message in (("raw", huge), ("clipped", admission.clip(huge))):
+        samples = []
+        for i in range(50):
+            start = time.perf_counter_ns()
+            chatbot.process_message(message + str(i), f"flood-{label}", include_reasoning=False)
+            samples.append(time.perf_counter_ns() - start)
+        p50, p99 = percentiles(samples)
+        print(f"admission {len(message):,}-char message {label}: process_message p50 {p50:.0f}us p99 {p99:.0f}us")
+
+
+# Messages the rules score as a near tie, for the intents they could mean
+AMBIGUOUS_MESSAGES = {
+    "skills": "technologies",
+    "tools": "technologies",
+    "experience": "experience with projects",
+    "projects": "experience with projects",
+    "education": "education and certifications",
+    "certifications": "education and certifications",
+    "contact": "contact or linkedin",
+    "social": "contact or linkedin",
+}
+
+
+def bench_transitions(train_sessions=5000, test_sessions=1000, session_length=6, ambiguity=0.5):
+    """Learned intent transitions: training cost and size, near-tie accuracy on a simulated flow, overhead"""
+    import numpy as np
+
+    rng = np.random.default_rng(7)
+    topics = [intent for intent in INTENT_RULES if intent not in ("greet", "bye")]
+    # Ground truth: each topic is mostly followed by a few favourite topics
+    truth = rng.dirichlet(np.full(len(topics), 0.1), size=len(topics))
+    phrases = {intent: message for message, intent in EXPECTED_INTENTS.items()}
+
+    def flow():
+        current = rng.integers(len(topics))
+        intents = ["greet"]
+        for _ in range(session_length):
+            intents.append(topics[current])
+            current = rng.choice(len(topics), p=truth[current])
+        return intents + ["bye"]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "transcript.jsonl")
+        transcript = TranscriptLog(path, max_queue=train_sessions * (session_length + 2))
+        for session in range(train_sessions):
+            for intent in flow():
+                transcript.record(f"train-{session}", intent, 0.8, [], phrases[intent])
+        transcript.close()
+
+        start = time.perf_counter()
+        transitions = IntentTransitions.from_transcripts([path], list(INTENT_RULES) + ["fallback"])
+        learn = time.perf_counter() - start
+        model_path = os.path.join(directory, "transitions.npz")
+        transitions.save(model_path)
+        print(f"transitions: learned {int(transitions.counts.sum())} transitions in {learn * 1000:.0f}ms, "
+              f"{os.path.getsize(model_path)} bytes on disk")
+        transitions = IntentTransitions.load(model_path)
+
+    sessions = [flow() for _ in range(test_sessions)]
+    messages = [[AMBIGUOUS_MESSAGES[intent] if intent in AMBIGUOUS_MESSAGES and rng.random() < ambiguity
+                 else phrases[intent] for intent in intents] for intents in sessions]
+    for label, model in (("rules only", None), ("with transitions", transitions)):
+        chatbot = EnhancedChatBot(PROFILE, transitions=model)
+        correct = ambiguous = 0
+        for session, (intents, texts) in enumerate(zip(sessions, messages)):
+            for intent, text in zip(intents, texts):
+                result = chatbot.process_message(text, f"test-{session}", include_reasoning=False)
+                if text == AMBIGUOUS_MESSAGES.get(intent):
+                    ambiguous += 1
+                    correct += result["intent"] == intent
+        print(f"transitions {label}: {correct / ambiguous:.1%} of {ambiguous} near-tie messages resolved correctly")
+
+    # Overhead on a near tie, which is the only case that consults the model
+    for label, model in (("rules only", None), ("with transitions", transitions)):
+        chatbot = EnhancedChatBot(PROFILE, transitions=model)
+        samples = []
+        for i in range(5000):
+            chatbot.process_message(phrases["skills"], f"overhead-{i}", include_reasoning=False)
+            start = time.perf_counter_ns()
+            chatbot.process_message("technologies", f"overhead-{i}", include_reasoning=False)
+            samples.append(time.perf_counter_ns() - start)
+        p50, p99 = percentiles(samples)
+        print(f"transitions {label}: near-tie process_message p50 {p50:.1f}us p99 {p99:.1f}us")
+
+
+# The console loop before piped input was batched: one process_message and one print per line
+LINE_AT_A_TIME_CONSOLE = """
+import sys
+from enhanced_chatbot import chatbot
+for line in sys.stdin:
+    result = chatbot.process_message(line.strip(), "console")
+    print("\\n--- Chain of Thought ---")
+    for i, thought in enumerate(result["chain_of_thought"], 1):
+        print(f"{i}. {thought}")
+    print(f"Confidence: {result['confidence']:.0%}")
+    print("------------------------")
+    print(f"Bot: {result['response']}\\n")
+"""
+
+
+def bench_console(lines=20000, history_size=100000):
+    """Piped console throughput per output mode, and history search with and without the index"""
+    import subprocess
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    script = "".join(SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)] + "\n" for i in range(lines)).encode("utf-8")
+    modes = (
+        ("line at a time", [sys.executable, "-c", LINE_AT_A_TIME_CONSOLE]),
+        ("batched", [sys.executable, "enhanced_chatbot.py", "console"]),
+        ("batched --quiet", [sys.executable, "enhanced_chatbot.py", "console", "--quiet"]),
+        ("batched --json", [sys.executable, "enhanced_chatbot.py", "console", "--json"]),
+    )
+    for label, command in modes:
+        start = time.perf_counter()
+        completed = subprocess.run(command, cwd=here, input=script, capture_output=True, check=True)
+        elapsed = time.perf_counter() - start
+        print(f"console {label}: {lines / elapsed:,.0f} lines/s including startup, "
+              f"{len(completed.stdout) / lines:.0f} bytes/answer")
+
+    rng = random.Random(3)
+    history = QuestionHistory()
+    for i in range(history_size):
+        history.add(f"{SAMPLE_MESSAGES[rng.randrange(len(SAMPLE_MESSAGES))]} #{i}", "bench")
+    queries = ["skills technologies", "projects", "#99999", "currently working"]
+    for query in queries:
+        start = time.perf_counter()
+        indexed = history.search(query)
+        index_us = (time.perf_counter() - start) * 1e6
+        start = time.perf_counter()
+        words = query.lower().split()
+        scanned = [question for question, _ in reversed(history.entries)
+                   if all(word.strip("#") in question.lower() for word in words)][:10]
+        scan_us = (time.perf_counter() - start) * 1e6
+        print(f"console history '{query}' over {history_size} questions: index {index_us:.0f}us, "
+              f"linear scan {scan_us:,.0f}us ({len(indexed)}/{len(scanned)} matches)")
+
+
+# --- Regression Suite ---
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks_baseline.json")
+# Generous by default: single-core CI runners easily swing p99 by 30-40% between runs
+REGRESSION_THRESHOLD = 0.5
+
+# Realistic visitor questions and the intent each must resolve to
+EXPECTED_INTENTS = {
+    "Hello there!": "greet",
+    "Who are you?": "name",
+    "What do you do for a living?": "role",
+    "What are your skills and technologies?": "skills",
+    "Where did you study? Which university and degree?": "education",
+    "Tell me about your work experience and career background": "experience",
+    "Show me your projects and portfolio": "projects",
+    "What are your hobbies and personal interests?": "interests",
+    "What are you currently working on?": "recent",
+    "How can I contact you to hire for freelance work?": "contact",
+    "What are your career goals and future plans?": "goals",
+    "Which tools and software do you use?": "tools",
+    "Where are you based? Which country are you from?": "location",
+    "Do you have any certifications or credentials?": "certifications",
+    "Share your LinkedIn and GitHub profile": "social",
+    "Goodbye, see you later": "bye",
+    "asdfghjkl": "fallback",
+    "Tell me a joke": "fallback",
+    "42?": "fallback",
+}
+
+PHRASE_TEMPLATES = [
+    "{phrase}",
+    "Can you tell me about {phrase}?",
+    "I was wondering, {phrase}... could you explain a bit more?",
+    "{phrase} please!",
+]
+
+
+def build_corpus(seed=1234):
+    """Every pattern of every intent in a few phrasings, plus realistic and fallback queries"""
+    rng = random.Random(seed)
+    corpus = list(EXPECTED_INTENTS) + SAMPLE_MESSAGES
+    for config in INTENT_RULES.values():
+        for pattern in config["patterns"]:
+            phrase = pattern.replace(r"\b", "")
+            corpus.append(rng.choice(PHRASE_TEMPLATES).format(phrase=phrase))
+    rng.shuffle(corpus)
+    return corpus
+
+
+def measure(func, corpus, rounds, repeats=3):
+    """Throughput, latency percentiles and peak traced allocation of func over corpus.
+
+    Timings are the best of `repeats` runs to keep scheduler noise out of the comparison.
+    """
+    for message in corpus:
+        func(message)
+
+    best = None
+    for _ in range(repeats):
+        samples = []
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for message in corpus:
+                op_start = time.perf_counter_ns()
+                func(message)
+                samples.append(time.perf_counter_ns() - op_start)
+        elapsed = time.perf_counter() - start
+        run = (len(samples) / elapsed,) + percentiles(samples)
+        best = run if best is None else (max(best[0], run[0]), min(best[1], run[1]), min(best[2], run[2]))
+    ops_per_sec, p50, p99 = best
+
+    tracemalloc.start()
+    for message in corpus:
+        func(message)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "ops_per_sec": ops_per_sec,
+        "p50_us": p50,
+        "p99_us": p99,
+        "peak_alloc_kb": peak / 1024,
+    }
+
+
+def run_suite(rounds):
+    corpus = build_corpus()
+    random.seed(0)
+    chatbot = EnhancedChatBot(PROFILE)
+    uncached = EnhancedChatBot(PROFILE, matcher=IntentMatcher(INTENT_RULES, cache_size=0))
+    client = app.test_client()
+
+    def api_chat(message):
+        response = client.post("/api/chat", json={"message": message, "session_id": "regression"})
+        assert response.status_code == 200
+
+    return {
+        "detect_intent": measure(lambda message: uncached.detect_intent(message, False), corpus, rounds),
+        "detect_intent_cached": measure(lambda message: chatbot.detect_intent(message, False), corpus, rounds),
+        "process_message": measure(lambda message: chatbot.process_message(message, "regression"), corpus, rounds),
+        "api_chat": measure(api_chat, corpus, max(rounds // 10, 1)),
+    }
+
+
+def check_behaviour():
+    """Intent results must not drift: expected intents and parity with per-pattern re.search"""
+    chatbot = EnhancedChatBot(PROFILE, matcher=IntentMatcher(INTENT_RULES, cache_size=0))
+    failures = []
+    for message, expected in EXPECTED_INTENTS.items():
+        actual = chatbot.detect_intent(message, False)["intent"]
+        if actual != expected:
+            failures.append(f"{message!r}: expected {expected}, got {actual}")
+    for message in build_corpus():
+        if legacy_best(message) != chatbot.matcher.best(message.lower().strip()):
+            failures.append(f"{message!r}: differs from per-pattern re.search")
+    return failures
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """Return a list of metrics that regressed by more than `threshold`"""
+    regressions = []
+    for target, metrics in results.items():
+        for metric, value in metrics.items():
+            reference = baseline.get(target, {}).get(metric)
+            if not reference:
+                continue
+            # Throughput regresses downwards; latency and memory upwards
+            change = (reference - value) / reference if metric == "ops_per_sec" else (value - reference) / reference
+            if change > threshold:
+                regressions.append(f"{target}.{metric}: {reference:,.2f} -> {value:,.2f} ({change:+.0%} worse)")
+    return regressions
+
+
+def bench_regression(update_baseline=False, threshold=REGRESSION_THRESHOLD, rounds=50):
+    """Full suite; returns False when behaviour changed or a metric regressed beyond threshold"""
+    failures = check_behaviour()
+    for failure in failures:
+        print(f"BEHAVIOUR  {failure}")
+
+    results = run_suite(rounds)
+    for target, metrics in results.items():
+        print(f"{target:22} {metrics['ops_per_sec']:>12,.0f} ops/s  p50 {metrics['p50_us']:8.1f}us  "
+              f"p99 {metrics['p99_us']:8.1f}us  peak alloc {metrics['peak_alloc_kb']:8.1f}KB")
+
+    if update_baseline:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {BASELINE_PATH}")
+        return not failures
+
+    if not os.path.exists(BASELINE_PATH):
+        print(f"No baseline at {BASELINE_PATH}; run with --update-baseline first")
+        return not failures
+
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = compare_to_baseline(results, baseline, threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions and not failures:
+        print(f"No regressions beyond {threshold:.0%} of baseline")
+    return not regressions and not failures
+
+
+BENCHMARKS = {
+    "matcher": bench_matcher,
+    "sessions": bench_sessions,
+    "memory": bench_memory,
+    "batch": bench_batch,
+    "reasoning": bench_reasoning,
+    "stream": bench_stream,
+    "reload": bench_reload,
+    "tenancy": bench_tenancy,
+    "cache": bench_cache,
+    "fuzzy": bench_fuzzy,
+    "semantic": bench_semantic,
+    "transcript": bench_transcript,
+    "startup": bench_startup,
+    "admission": bench_admission,
+    "transitions": bench_transitions,
+    "console": bench_console,
+    "regression": bench_regression,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("names", nargs="*", metavar="name", help=f"benchmarks to run: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--update-baseline", action="store_true", help="regression: record a new baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="regression: allowed relative slowdown (default %(default)s)")
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    options = {"regression": {"update_baseline": args.update_baseline, "threshold": args.threshold}}
+    names = args.names or [name for name in BENCHMARKS if name != "regression"]
+    ok = True
+    for name in names:
+        if BENCHMARKS[name](**options.get(name, {})) is False:
+            ok = False
+    sys.exit(0 if ok else 1)
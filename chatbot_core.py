@@ -0,0 +1,2239 @@
+"""Core engine of the Enhanced Chatbot: profile, intent rules, matching, sessions and the bot itself.
+
+Importable without the web stack; enhanced_chatbot.py adds the Flask app, the
+shared request handlers and the command line on top of it.
+"""
+import os
+import re
+import sys
+import json
+import math
+import random
+import bisect
+import hashlib
+import io
+import time
+import pickle
+import queue
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+
+# --- Enhanced Profile Database ---
+PROFILE = {
+    "name": "Anand Dubey",
+    "role": "Data Analyst",
+    "skills": ["Python", "Excel", "SQL", "Power BI", "Tableau"],
+    "education": "B.Tech in AIML from Bennett University",
+    "experience": "1+ year research internship, 7+ months industry experience",
+    "projects": ["EV Sales Analysis", "Credit Risk Prediction", "TSP Genetic Algorithm", "Healthcare Symptom Checker", "Visit Velocity Analysis"],
+    "interests": ["Data Analysis", "Data Engineering", "Hackathons", "Resume Projects"],
+    "recent": "Working as Data Analyst and shifting focus from AI/ML to core analytics",
+    "location": "India",
+    "contact": "Available for freelance projects and collaborations",
+    "strengths": ["Problem Solving", "Analytical Thinking", "Data Visualization", "Statistical Analysis"],
+    "tools": ["Jupyter Notebook", "VS Code", "Git", "Docker", "AWS"],
+    "certifications": ["Data Analysis Specialization", "Python for Data Science"],
+    "goals": "To become a senior data analyst and eventually lead data science teams",
+    "linkedin": "https://linkedin.com/in/anand-dubey",
+    "github": "https://github.com/anand-dubey",
+    "portfolio": "https://anand-dubey-portfolio.com"
+}
+
+# --- Advanced Intent Rules with Confidence Scoring ---
+INTENT_RULES = {
+    "greet": {
+        "patterns": [r"\bhello\b", r"\bhi\b", r"\bhey\b", r"\bstart\b", r"\bgood morning\b", r"\bgood evening\b"],
+        "weight": 1.0,
+        "entities": []
+    },
+    "name": {
+        "patterns": [r"your name", r"who are you", r"introduce yourself", r"about yourself", r"tell me about you"],
+        "weight": 0.9,
+        "entities": ["name", "identity"]
+    },
+    "role": {
+        "patterns": [r"what do you do", r"your job", r"your position", r"work as", r"profession", r"occupation"],
+        "weight": 0.8,
+        "entities": ["job", "role", "position"]
+    },
+    "skills": {
+        "patterns": [r"your skills", r"what can you do", r"technologies", r"programming", r"technical skills", r"expertise"],
+        "weight": 0.9,
+        "entities": ["skills", "technology", "programming"]
+    },
+    "education": {
+        "patterns": [r"education", r"college", r"university", r"degree", r"study", r"qualification", r"academic"],
+        "weight": 0.8,
+        "entities": ["education", "degree", "university"]
+    },
+    "experience": {
+        "patterns": [r"experience", r"worked", r"background", r"career", r"professional", r"work history"],
+        "weight": 0.9,
+        "entities": ["experience", "work", "career"]
+    },
+    "projects": {
+        "patterns": [r"projects", r"portfolio", r"built", r"created", r"developed", r"work samples"],
+        "weight": 0.9,
+        "entities": ["projects", "portfolio", "work"]
+    },
+    "interests": {
+        "patterns": [r"interests", r"hobbies", r"passion", r"like", r"enjoy", r"personal interests"],
+        "weight": 0.7,
+        "entities": ["interests", "hobbies", "passion"]
+    },
+    "recent": {
+        "patterns": [r"currently", r"now", r"latest", r"recent", r"working on", r"current work"],
+        "weight": 0.8,
+        "entities": ["current", "recent", "now"]
+    },
+    "contact": {
+        "patterns": [r"contact", r"reach", r"hire", r"collaborate", r"freelance", r"get in touch"],
+        "weight": 0.8,
+        "entities": ["contact", "hire", "collaborate"]
+    },
+    "goals": {
+        "patterns": [r"goals", r"future", r"ambition", r"plan", r"aspire", r"aim", r"career goals"],
+        "weight": 0.7,
+        "entities": ["goals", "future", "ambition"]
+    },
+    "tools": {
+        "patterns": [r"tools", r"software", r"applications", r"use", r"work with", r"technologies"],
+        "weight": 0.7,
+        "entities": ["tools", "software", "applications"]
+    },
+    "location": {
+        "patterns": [r"where", r"location", r"based", r"from", r"live", r"country"],
+        "weight": 0.6,
+        "entities": ["location", "place", "where"]
+    },
+    "certifications": {
+        "patterns": [r"certifications", r"certificates", r"certified", r"credentials", r"qualifications"],
+        "weight": 0.7,
+        "entities": ["certifications", "credentials"]
+    },
+    "social": {
+        "patterns": [r"linkedin", r"github", r"portfolio", r"social", r"profile", r"website"],
+        "weight": 0.8,
+        "entities": ["social", "profile", "portfolio"]
+    },
+    "bye": {
+        "patterns": [r"\bbye\b", r"goodbye", r"see you", r"talk later", r"exit", r"quit"],
+        "weight": 1.0,
+        "entities": []
+    }
+}
+
+# --- Caching ---
+class LRUCache:
+    """Bounded, thread-safe LRU mapping with hit/miss counters; max_entries=0 disables it"""
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+# --- Instrumentation ---
+class EngineMetrics:
+    """Per-stage, per-intent latency histograms rendered in Prometheus text format"""
+
+    STAGES = ("detect", "respond", "context", "session_store", "total")
+    BUCKETS_NS = (
+        5000, 10000, 25000, 50000, 100000, 250000, 500000,
+        1000000, 2500000, 5000000, 10000000, 50000000, 250000000
+    )
+
+    def __init__(self):
+        self._histograms = {}  # (stage, intent) -> [bucket counts..., count, sum_ns]
+        self._lock = threading.Lock()
+
+    def observe(self, stage, intent, duration_ns):
+        index = bisect.bisect_left(self.BUCKETS_NS, duration_ns)
+        key = (stage, intent)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(self.BUCKETS_NS) + 2)
+            if index < len(self.BUCKETS_NS):
+                histogram[index] += 1
+            histogram[-2] += 1
+            histogram[-1] += duration_ns
+
+    def snapshot(self):
+        with self._lock:
+            return {key: list(histogram) for key, histogram in self._histograms.items()}
+
+    def render_prometheus(self, caches=None):
+        """Render histograms, plus hit/miss counters for any {name: LRUCache} given"""
+        lines = [
+            "# HELP chatbot_stage_duration_seconds Time spent in each message processing stage",
+            "# TYPE chatbot_stage_duration_seconds histogram",
+        ]
+        bounds = [f"{bound / 1e9:g}" for bound in self.BUCKETS_NS]
+        for (stage, intent), histogram in sorted(self.snapshot().items()):
+            labels = f'stage="{stage}",intent="{intent}"'
+            cumulative = 0
+            for bound, count in zip(bounds, histogram):
+                cumulative += count
+                lines.append(f'chatbot_stage_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'chatbot_stage_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram[-2]}')
+            lines.append(f"chatbot_stage_duration_seconds_sum{{{labels}}} {histogram[-1] / 1e9:.9f}")
+            lines.append(f"chatbot_stage_duration_seconds_count{{{labels}}} {histogram[-2]}")
+        
+        for name, cache in (caches or {}).items():
+            stats = cache.stats()
+            for field in ("hits", "misses"):
+                lines.append(f"# TYPE chatbot_{name}_{field}_total counter")
+                lines.append(f"chatbot_{name}_{field}_total {stats[field]}")
+            lines.append(f"# TYPE chatbot_{name}_entries gauge")
+            lines.append(f"chatbot_{name}_entries {stats['size']}")
+        return "\n".join(lines) + "\n"
+
+class ProfileSampler:
+    """Runs cProfile on a random fraction of requests and accumulates the results.
+
+    Off by default; set_rate() switches it on at runtime. Only one request is
+    profiled at a time, since cProfile cannot nest across threads. cProfile and
+    pstats are imported on the first sampled request.
+    """
+
+    def __init__(self, sample_rate=0.0):
+        self.sample_rate = sample_rate
+        self.samples = 0
+        self._stats = None
+        self._active = threading.Lock()
+        self._lock = threading.Lock()
+
+    def set_rate(self, sample_rate):
+        self.sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+
+    def begin(self):
+        """Return a running profiler if this request is sampled, else None"""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+        if not self._active.acquire(blocking=False):
+            return None
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def end(self, profiler):
+        if profiler is None:
+            return
+        profiler.disable()
+        self._active.release()
+        import pstats
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profiler)
+            else:
+                self._stats.add(profiler)
+            self.samples += 1
+
+    def report(self, limit=30):
+        """Cumulative-time report over all sampled requests"""
+        with self._lock:
+            if self._stats is None:
+                return "No requests sampled yet.\n"
+            out = io.StringIO()
+            self._stats.stream = out
+            out.write(f"{self.samples} sampled request(s)\n")
+            self._stats.sort_stats("cumulative").print_stats(limit)
+            return out.getvalue()
+
+    def reset(self):
+        with self._lock:
+            self._stats = None
+            self.samples = 0
+
+# --- Admission Control ---
+class TokenBucketLimiter:
+    """Per-client token buckets: `rate` requests/second sustained, bursts of up to `burst`.
+
+    No lock on the hot path: a bucket is a [tokens, last_refill] list updated in
+    place, so two racing requests from one client may both spend the same token.
+    Once more than `max_clients` buckets exist, idle ones are pruned.
+    """
+
+    def __init__(self, rate, burst=None, max_clients=100000):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(rate, 1))
+        self.max_clients = max_clients
+        self._buckets = {}
+        self._prune_lock = threading.Lock()
+
+    def take(self, client, now=None):
+        """Spend one of `client`'s tokens; returns 0 if admitted, else seconds until one is available"""
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets.setdefault(client, [self.burst, now])
+            if len(self._buckets) > self.max_clients:
+                self._prune(now)
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            return (1 - tokens) / self.rate
+        bucket[0] = tokens - 1
+        return 0
+
+    def _prune(self, now):
+        """Forget refilled buckets (a new one is identical), then the stalest, down to 3/4 of max_clients"""
+        if not self._prune_lock.acquire(blocking=False):
+            return
+        try:
+            refill_time = self.burst / self.rate
+            buckets = self._buckets.copy()
+            for client, bucket in list(buckets.items()):
+                if now - bucket[1] >= refill_time:
+                    del buckets[client]
+                    self._buckets.pop(client, None)
+            excess = len(buckets) - self.max_clients * 3 // 4
+            if excess > 0:
+                for client in sorted(buckets, key=lambda c: buckets[c][1])[:excess]:
+                    self._buckets.pop(client, None)
+        finally:
+            self._prune_lock.release()
+
+    def __len__(self):
+        return len(self._buckets)
+
+class AdmissionController:
+    """Decides whether a request is served: per-client rate limit, cap on requests in
+    flight and maximum message length, counting everything it sheds or truncates.
+
+    admit() returns None when the request may proceed (call release() when done),
+    else (429, retry_after) when the client is over its rate or (503, retry_after)
+    when too many requests are in flight. A limit of 0/None disables it.
+    """
+
+    def __init__(self, limiter=None, max_inflight=0, max_message_length=0):
+        self.limiter = limiter
+        self.max_inflight = max_inflight
+        self.max_message_length = max_message_length
+        self.inflight = 0
+        self.rate_limited = 0
+        self.overloaded = 0
+        self.truncated = 0
+        self._lock = threading.Lock()
+
+    def admit(self, client):
+        if self.limiter is not None:
+            retry_after = self.limiter.take(client)
+            if retry_after:
+                with self._lock:
+                    self.rate_limited += 1
+                return 429, retry_after
+        with self._lock:
+            if self.max_inflight and self.inflight >= self.max_inflight:
+                self.overloaded += 1
+                return 503, 1
+            self.inflight += 1
+        return None
+
+    def release(self):
+        with self._lock:
+            self.inflight -= 1
+
+    def clip(self, message):
+        """Cut `message` to max_message_length before it reaches the matcher"""
+        if self.max_message_length and len(message) > self.max_message_length:
+            with self._lock:
+                self.truncated += 1
+            return message[:self.max_message_length]
+        return message
+
+    def stats(self):
+        with self._lock:
+            return {
+                "inflight": self.inflight,
+                "rate_limited": self.rate_limited,
+                "overloaded": self.overloaded,
+                "truncated": self.truncated,
+                "tracked_clients": len(self.limiter) if self.limiter is not None else 0
+            }
+
+    def render_prometheus(self):
+        stats = self.stats()
+        return "\n".join([
+            "# HELP chatbot_requests_shed_total Requests refused by admission control",
+            "# TYPE chatbot_requests_shed_total counter",
+            f'chatbot_requests_shed_total{{reason="rate_limited"}} {stats["rate_limited"]}',
+            f'chatbot_requests_shed_total{{reason="overloaded"}} {stats["overloaded"]}',
+            "# TYPE chatbot_messages_truncated_total counter",
+            f"chatbot_messages_truncated_total {stats['truncated']}",
+            "# TYPE chatbot_requests_inflight gauge",
+            f"chatbot_requests_inflight {stats['inflight']}",
+        ]) + "\n"
+
+# --- Typo-Tolerant Lookup ---
+def bounded_edit_distance(a, b, limit):
+    """Optimal string alignment distance between a and b, or limit + 1 once it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous_row = None
+    row = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before_previous, previous_row = previous_row, row
+        row = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, before_previous[j - 2] + 1)
+            row[j] = value
+        if min(row) > limit:
+            return limit + 1
+    return row[-1]
+
+class FuzzyIndex:
+    """Character-trigram inverted index over the words of the pattern phrases.
+
+    A misspelled word only ever meets the vocabulary words it shares trigrams
+    with, so lookups stay sublinear in the vocabulary size; survivors of the
+    q-gram filter get a bounded edit-distance check.
+    """
+
+    MIN_WORD_LENGTH = 4
+    # Most four-letter words are one edit from another real word ("love" -> "live",
+    # "form" -> "from"), so only longer words are corrected
+    MIN_CORRECTED_LENGTH = 5
+
+    def __init__(self, words):
+        self.words = sorted(set(word for word in words if len(word) >= self.MIN_WORD_LENGTH))
+        self.vocabulary = frozenset(words)
+        # (first letter, trigram) -> ids of words containing it. Typos rarely hit
+        # the first letter, so candidates must share it; keying on it keeps the
+        # posting lists short.
+        self.index = {}
+        for word_id, word in enumerate(self.words):
+            for gram in self._trigrams(word):
+                self.index.setdefault((word[0], gram), []).append(word_id)
+
+    @staticmethod
+    def _trigrams(word):
+        padded = f"  {word} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    @staticmethod
+    def max_edits(length):
+        return 1 if length <= 6 else 2
+
+    def correct(self, word):
+        """Return the closest vocabulary word within the edit budget, or None"""
+        if len(word) < self.MIN_CORRECTED_LENGTH or word in self.vocabulary:
+            return None
+        budget = self.max_edits(len(word))
+        grams = self._trigrams(word)
+        shared = {}
+        first = word[0]
+        for gram in grams:
+            for word_id in self.index.get((first, gram), ()):
+                shared[word_id] = shared.get(word_id, 0) + 1
+
+        # One edit (a transposition included) can break at most 4 trigrams
+        needed = len(grams) - 4 * budget
+        candidates = [word_id for word_id, count in shared.items()
+                      if count >= needed and abs(len(self.words[word_id]) - len(word)) <= budget]
+        # Most shared trigrams first: the closest word is usually among the first few
+        candidates.sort(key=lambda word_id: (-shared[word_id], word_id))
+        best_word = None
+        best_distance = budget + 1
+        for word_id in candidates:
+            candidate = self.words[word_id]
+            distance = bounded_edit_distance(word, candidate, best_distance - 1)
+            if distance < best_distance:
+                best_word, best_distance = candidate, distance
+                if distance == 1:
+                    break  # word is not in the vocabulary, so nothing is closer
+        return best_word
+
+# --- Compiled Intent Matcher ---
+class IntentMatcher:
+    """Single-pass intent matcher compiled once from an intent rules table.
+
+    Literal patterns (optionally wrapped in \\b) are merged into one trie-shaped
+    regex that is run once over the message; any other pattern falls back to
+    its own precompiled regex. Scores, matched patterns and entities are
+    identical to searching every pattern with re.search(..., re.IGNORECASE).
+    """
+
+    REGEX_METACHARS = set(".^$*+?{}[]\\|()")
+    CACHE_SIZE = 4096
+    # Long messages are rarely repeated verbatim and would make large cache keys
+    MAX_CACHED_LENGTH = 256
+    # Typo-corrected matches count for less than exact ones
+    FUZZY_SCORE_FACTOR = 0.75
+    # Only the first distinct words of a message are spell-checked, which bounds the
+    # cost of long unmatched messages (they are not cached either)
+    MAX_FUZZY_WORDS = 24
+    WORD_PATTERN = re.compile(r"[a-z]+")
+
+    def __init__(self, rules, compiled=None, cache_size=CACHE_SIZE, fuzzy=True):
+        self.rules = rules
+        self.cache_size = cache_size
+        self.cache = LRUCache(cache_size)
+        self.fuzzy_cache = LRUCache(cache_size)
+        self.tie_cache = LRUCache(cache_size)
+        # pattern -> regex, compiled on first use; most literals never need one
+        self.compiled = {}
+        previous = compiled or {}
+        self.patterns = []  # every distinct pattern, in rule order
+        self.fallback_patterns = []
+        literals = {}
+        seen = set()
+
+        for config in rules.values():
+            for pattern in config["patterns"]:
+                if pattern in seen:
+                    continue
+                seen.add(pattern)
+                self.patterns.append(pattern)
+                if pattern in previous:
+                    self.compiled[pattern] = previous[pattern]
+                literal = self._literal_text(pattern)
+                if literal is None:
+                    self.fallback_patterns.append(pattern)
+                    self._regex(pattern)
+                else:
+                    literals.setdefault(literal, []).append(pattern)
+
+        # Every pattern that can match at a position is a prefix of the longest
+        # literal found there, so each literal maps to all of its prefixes.
+        # Patterns with word boundaries still need a positional check.
+        self.prefixes = {}
+        for literal in literals:
+            self.prefixes[literal] = [
+                (pattern, None if pattern.lower() == other else self._regex(pattern))
+                for other, patterns in literals.items() if literal.startswith(other)
+                for pattern in patterns
+            ]
+
+        self.scanner = None
+        if literals:
+            self.scanner = re.compile("(?=(%s))" % self._trie_regex(literals))
+
+        self.intent_patterns = [
+            (intent, config, frozenset(config["patterns"])) for intent, config in rules.items()
+        ]
+
+        self.fuzzy = None
+        if fuzzy and literals:
+            self.fuzzy = FuzzyIndex([word for literal in literals for word in self.WORD_PATTERN.findall(literal)])
+
+    def __getstate__(self):
+        # The memoization caches hold locks and are rebuilt empty on load
+        state = self.__dict__.copy()
+        del state["cache"], state["fuzzy_cache"], state["tie_cache"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.cache = LRUCache(self.cache_size)
+        self.fuzzy_cache = LRUCache(self.cache_size)
+        self.tie_cache = LRUCache(self.cache_size)
+
+    def _regex(self, pattern):
+        regex = self.compiled.get(pattern)
+        if regex is None:
+            regex = self.compiled[pattern] = re.compile(pattern, re.IGNORECASE)
+        return regex
+
+    def _literal_text(self, pattern):
+        """Return the plain text of a literal pattern, or None if it needs a real regex"""
+        text = pattern
+        if text.startswith(r"\b"):
+            text = text[2:]
+        if text.endswith(r"\b"):
+            text = text[:-2]
+        if not text or not text.isascii() or any(ch in self.REGEX_METACHARS for ch in text):
+            return None
+        return text.lower()
+
+    def _trie_regex(self, literals):
+        """Build a regex whose greedy branches always return the longest literal at a position"""
+        trie = {}
+        for literal in literals:
+            node = trie
+            for ch in literal:
+                node = node.setdefault(ch, {})
+            node[""] = {}
+
+        def render(node):
+            branches = [re.escape(ch) + render(child) for ch, child in sorted(node.items()) if ch]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else "(?:%s)" % "|".join(branches)
+            return "(?:%s)?" % body if "" in node else body
+
+        return render(trie)
+
+    def find(self, text):
+        """Return the set of patterns that occur in already-lowercased text"""
+        if not text.isascii():
+            # Unicode case folding can differ from str.lower(); stay exact
+            return {pattern for pattern in self.patterns if self._regex(pattern).search(text)}
+
+        found = set()
+        if self.scanner is not None:
+            for match in self.scanner.finditer(text):
+                position = match.start()
+                for pattern, regex in self.prefixes[match.group(1)]:
+                    if pattern not in found and (regex is None or regex.match(text, position)):
+                        found.add(pattern)
+        for pattern in self.fallback_patterns:
+            if self.compiled[pattern].search(text):
+                found.add(pattern)
+        return found
+
+    def best(self, text):
+        """Return (intent, score, matched_patterns, entities) for the top scoring intent.
+
+        Results are memoized on the normalized text; repeated questions skip the scan.
+        """
+        if len(text) > self.MAX_CACHED_LENGTH:
+            return self._best(text)
+        result = self.cache.get(text)
+        if result is None:
+            result = self._best(text)
+            self.cache.put(text, result)
+        return result
+
+    def best_fuzzy(self, text):
+        """Typo-tolerant fallback for text the exact matcher scored zero.
+
+        Misspelled words are replaced by their closest pattern word and the
+        corrected text is scored again. Returns (intent, score, matched_patterns,
+        entities, corrections) with the score scaled by FUZZY_SCORE_FACTOR.
+        """
+        if self.fuzzy is None:
+            return "fallback", 0, [], [], ()
+        cacheable = len(text) <= self.MAX_CACHED_LENGTH
+        result = self.fuzzy_cache.get(text) if cacheable else None
+        if result is None:
+            result = self._best_fuzzy(text)
+            if cacheable:
+                self.fuzzy_cache.put(text, result)
+        return result
+
+    def _best_fuzzy(self, text):
+        corrections = {}
+        for word in list(dict.fromkeys(self.WORD_PATTERN.findall(text)))[:self.MAX_FUZZY_WORDS]:
+            corrected = self.fuzzy.correct(word)
+            if corrected is not None:
+                corrections[word] = corrected
+        if not corrections:
+            return "fallback", 0, [], [], ()
+
+        corrected_text = self.WORD_PATTERN.sub(lambda match: corrections.get(match.group(), match.group()), text)
+        best_intent, max_score, matched_patterns, extracted_entities = self._best(corrected_text)
+        if max_score == 0:
+            return "fallback", 0, [], [], ()
+        return (best_intent, max_score * self.FUZZY_SCORE_FACTOR, matched_patterns, extracted_entities,
+                tuple(sorted(corrections.items())))
+
+    def _best(self, text):
+        best_intent = "fallback"
+        max_score = 0
+        matched_patterns = []
+        extracted_entities = []
+
+        found = self.find(text)
+        if not found:
+            return best_intent, max_score, matched_patterns, extracted_entities
+
+        for intent, config, pattern_set in self.intent_patterns:
+            if found.isdisjoint(pattern_set):
+                continue
+            intent_matches = [pattern for pattern in config["patterns"] if pattern in found]
+            score = 0
+            for _ in intent_matches:
+                score += config["weight"]
+
+            if score > max_score:
+                max_score = score
+                best_intent = intent
+                matched_patterns = intent_matches
+                extracted_entities = config["entities"]
+
+        return best_intent, max_score, matched_patterns, extracted_entities
+
+    def scores(self, text):
+        """Rule score of every intent with at least one match: {intent: (score, matched_patterns)}"""
+        found = self.find(text)
+        results = {}
+        if not found:
+            return results
+        for intent, config, pattern_set in self.intent_patterns:
+            if found.isdisjoint(pattern_set):
+                continue
+            intent_matches = [pattern for pattern in config["patterns"] if pattern in found]
+            results[intent] = (config["weight"] * len(intent_matches), intent_matches)
+        return results
+
+    def near_ties(self, text, margin):
+        """Intents scoring within `margin` (a fraction) of the best: {intent: (score, matched_patterns)}.
+
+        Empty unless at least two intents qualify; memoized like best().
+        """
+        key = (text, margin)
+        cacheable = len(text) <= self.MAX_CACHED_LENGTH
+        result = self.tie_cache.get(key) if cacheable else None
+        if result is None:
+            scores = self.scores(text)
+            top = max((score for score, _ in scores.values()), default=0)
+            result = {intent: scored for intent, scored in scores.items() if scored[0] >= top * (1 - margin)}
+            if len(result) < 2:
+                result = {}
+            if cacheable:
+                self.tie_cache.put(key, result)
+        return result
+
+# --- Rule Compilation Cache ---
+RULES_CACHE_FORMAT = 1
+
+def rules_fingerprint(rules):
+    """Stable hash of a rules table, used to validate a cached compilation"""
+    body = json.dumps(rules, sort_keys=True)
+    return hashlib.sha1(f"{RULES_CACHE_FORMAT}:{body}".encode("utf-8")).hexdigest()
+
+def save_matcher(matcher, path):
+    """Pickle a compiled matcher with the fingerprint of its rules; written atomically"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        pickle.dump((rules_fingerprint(matcher.rules), matcher), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+
+def load_matcher(rules, cache_path=None):
+    """Return an IntentMatcher for rules, reusing the one cached at cache_path if it still matches.
+    
+    A missing, stale or unreadable cache is rebuilt and rewritten when the
+    location is writable. The file is unpickled, so it must be as trusted as the code.
+    """
+    if cache_path is None:
+        return IntentMatcher(rules)
+    try:
+        with open(cache_path, "rb") as f:
+            fingerprint, matcher = pickle.load(f)
+        if fingerprint == rules_fingerprint(rules):
+            return matcher
+    except Exception:
+        pass  # Missing or corrupt: compile from scratch below
+    matcher = IntentMatcher(rules)
+    try:
+        save_matcher(matcher, cache_path)
+    except OSError:
+        pass  # Read-only deployments just compile at startup
+    return matcher
+
+# --- Semantic Scorer ---
+class TfidfScorer:
+    """TF-IDF similarity between a message and each intent's patterns and entities.
+
+    Fitted from the rules alone. Intent vectors are L2-normalized rows of a dense
+    NumPy matrix, or of a CSR matrix (data/indices/indptr arrays) once the
+    vocabulary outgrows DENSE_VOCABULARY_LIMIT, so scoring a message against all
+    intents is one matrix-vector product and scoring a batch one matrix-matrix
+    product. Requires NumPy.
+    """
+
+    DENSE_VOCABULARY_LIMIT = 2048
+    # Below this cosine similarity a message is not considered a paraphrase of anything
+    MIN_SIMILARITY = 0.2
+    TOKEN_PATTERN = re.compile(r"[a-z0-9+#]+")
+    REGEX_ESCAPE = re.compile(r"\\[a-zA-Z]")
+    STOP_WORDS = frozenset([
+        "a", "an", "the", "and", "or", "of", "to", "in", "on", "at", "for", "is", "are", "was",
+        "do", "does", "did", "you", "your", "i", "me", "my", "it", "what", "how", "can", "could",
+        "tell", "about", "any", "have", "has",
+    ])
+
+    def __init__(self, rules, dense=None):
+        try:
+            import numpy as np
+        except ImportError:
+            raise RuntimeError("NumPy is required for semantic scoring (pip install numpy)")
+
+        self.intents = list(rules)
+        self.intent_index = {intent: i for i, intent in enumerate(self.intents)}
+        self.entities = [rules[intent]["entities"] for intent in self.intents]
+        documents = []
+        for intent in self.intents:
+            config = rules[intent]
+            text = " ".join(self.REGEX_ESCAPE.sub(" ", pattern) for pattern in config["patterns"])
+            documents.append(self.terms(text + " " + " ".join(config["entities"])))
+
+        self.vocabulary = {term: i for i, term in enumerate(sorted(set().union(*documents)))}
+        document_frequency = np.zeros(len(self.vocabulary))
+        for document in documents:
+            for term in set(document):
+                document_frequency[self.vocabulary[term]] += 1
+        self.idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1
+
+        data, indices, indptr = [], [], [0]
+        for document in documents:
+            row = self._weights(document)
+            for column in sorted(row):
+                indices.append(column)
+                data.append(row[column])
+            indptr.append(len(indices))
+        self.data = np.array(data)
+        self.indices = np.array(indices, dtype=np.intp)
+        self.indptr = np.array(indptr, dtype=np.intp)
+        self.nonempty = np.flatnonzero(self.indptr[:-1] < self.indptr[1:])
+
+        self.dense = len(self.vocabulary) <= self.DENSE_VOCABULARY_LIMIT if dense is None else dense
+        self.matrix = None
+        if self.dense:
+            self.matrix = np.zeros((len(self.intents), len(self.vocabulary)))
+            for row in range(len(self.intents)):
+                start, end = self.indptr[row], self.indptr[row + 1]
+                self.matrix[row, self.indices[start:end]] = self.data[start:end]
+
+    @classmethod
+    def stem(cls, word):
+        """Crude suffix stripping so "projects", "studied" and "studies" meet their patterns"""
+        if len(word) > 4 and word.endswith("ies"):
+            return word[:-3] + "y"
+        if len(word) > 4 and word.endswith("ied"):
+            return word[:-3] + "y"
+        for suffix in ("ing", "ed", "es", "s"):
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3 and not word.endswith("ss"):
+                return word[:-len(suffix)]
+        return word
+
+    @classmethod
+    def terms(cls, text):
+        return [cls.stem(token) for token in cls.TOKEN_PATTERN.findall(text.lower()) if token not in cls.STOP_WORDS]
+
+    def _weights(self, terms):
+        """Normalized sublinear TF-IDF weights of known terms: {column: weight}"""
+        counts = {}
+        for term in terms:
+            column = self.vocabulary.get(term)
+            if column is not None:
+                counts[column] = counts.get(column, 0) + 1
+        weights = {column: (1 + math.log(count)) * float(self.idf[column]) for column, count in counts.items()}
+        norm = sum(weight * weight for weight in weights.values()) ** 0.5
+        return {column: weight / norm for column, weight in weights.items()} if norm else {}
+
+    def vectorize(self, texts):
+        """Query matrix with one normalized TF-IDF row per text"""
+        import numpy as np
+        vectors = np.zeros((len(texts), len(self.vocabulary)))
+        for row, text in enumerate(texts):
+            for column, weight in self._weights(self.terms(text)).items():
+                vectors[row, column] = weight
+        return vectors
+
+    def score_batch(self, texts):
+        """Cosine similarity of every text with every intent, shape (len(texts), len(intents))"""
+        import numpy as np
+        vectors = self.vectorize(texts)
+        if self.dense:
+            return vectors @ self.matrix.T
+        # CSR product: gather each stored entry's query weight, then sum per intent row
+        products = vectors[:, self.indices] * self.data
+        similarities = np.zeros((len(texts), len(self.intents)))
+        if len(self.nonempty):
+            similarities[:, self.nonempty] = np.add.reduceat(products, self.indptr[self.nonempty], axis=1)
+        return similarities
+
+    def score(self, text):
+        """Cosine similarity of text with every intent"""
+        return self.score_batch([text])[0]
+
+    def blend(self, matcher, text, weight, similarities=None):
+        """Combine rule scores with weighted similarities; returns
+        (intent, score, matched_patterns, entities, similarity).
+
+        Memoized in the matcher's intent cache next to best(), keyed on the normalized text and weight.
+        """
+        if len(text) > matcher.MAX_CACHED_LENGTH:
+            return self._blend(matcher, text, weight, similarities)
+        key = (text, weight)
+        result = matcher.cache.get(key)
+        if result is None:
+            result = self._blend(matcher, text, weight, similarities)
+            matcher.cache.put(key, result)
+        return result
+
+    def _blend(self, matcher, text, weight, similarities):
+        if similarities is None:
+            similarities = self.score(text)
+        blended = similarities * weight
+        rule_scores = matcher.scores(text)
+        for intent, (score, _) in rule_scores.items():
+            index = self.intent_index.get(intent)
+            if index is not None:
+                blended[index] += score
+        top = int(blended.argmax())
+        similarity = float(similarities[top])
+        if not rule_scores and similarity < self.MIN_SIMILARITY:
+            return "fallback", 0, [], [], similarity
+        intent = self.intents[top]
+        matched_patterns = rule_scores[intent][1] if intent in rule_scores else []
+        return intent, float(blended[top]), matched_patterns, self.entities[top], similarity
+
+# --- Context Memory with Enhanced Tracking ---
+class IntentRecord:
+    """One entry of a session's intent history"""
+    __slots__ = ("intent", "timestamp", "input")
+
+    def __init__(self, intent, timestamp, user_input):
+        self.intent = intent
+        self.timestamp = timestamp
+        self.input = user_input
+
+class EntityStats:
+    """How often an entity came up in a session and when it was last seen"""
+    __slots__ = ("count", "last_seen", "context")
+
+    def __init__(self):
+        self.count = 0
+        self.last_seen = 0.0
+        self.context = None
+
+class ConversationContext:
+    HISTORY_DEPTH = 10
+    MAX_INPUT_CHARS = 200
+
+    def __init__(self, history_depth=HISTORY_DEPTH):
+        self.history_depth = history_depth
+        self.reset()
+    
+    def reset(self):
+        self.last_intent = None
+        self.intent_history = deque(maxlen=self.history_depth)
+        self.entity_memory = {}
+        self.conversation_count = 0
+        self.user_preferences = {}
+        self.session_start = datetime.now()
+        self.topics_discussed = set()
+    
+    def update(self, intent, entities, user_input, timestamp=None):
+        now = time.time() if timestamp is None else timestamp
+        self.last_intent = intent
+        self.intent_history.append(IntentRecord(intent, now, user_input[:self.MAX_INPUT_CHARS]))
+        self.conversation_count += 1
+        self.topics_discussed.add(intent)
+        
+        # Update entity memory
+        for entity in entities:
+            stats = self.entity_memory.get(entity)
+            if stats is None:
+                stats = self.entity_memory[entity] = EntityStats()
+            stats.count += 1
+            stats.last_seen = now
+            stats.context = intent
+    
+    def recent_intents(self, count=3):
+        """Return the last `count` intents, oldest first"""
+        history = self.intent_history
+        start = max(len(history) - count, 0)
+        return [history[i].intent for i in range(start, len(history))]
+
+# --- Question History ---
+class QuestionHistory:
+    """Every question asked in a session, with an inverted word index so search stays fast as it grows"""
+
+    WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+    def __init__(self):
+        self.entries = []  # (question, intent), in the order asked
+        self.postings = {}  # word -> ascending entry numbers
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, question, intent=None):
+        number = len(self.entries)
+        self.entries.append((question, intent))
+        for word in set(self.WORD_PATTERN.findall(question.lower())):
+            self.postings.setdefault(word, []).append(number)
+
+    def search(self, query="", limit=10):
+        """Most recent questions containing every word of `query`: [(turn, question, intent)].
+
+        An empty query returns the latest questions.
+        """
+        words = set(self.WORD_PATTERN.findall(query.lower()))
+        if not words:
+            numbers = range(len(self.entries) - 1, max(len(self.entries) - limit, 0) - 1, -1)
+        else:
+            # Walk the rarest word's postings newest first and binary-search the others
+            lists = sorted((self.postings.get(word, []) for word in words), key=len)
+            numbers = []
+            for number in reversed(lists[0]):
+                if all(self._contains(other, number) for other in lists[1:]):
+                    numbers.append(number)
+                    if len(numbers) == limit:
+                        break
+        return [(number + 1,) + self.entries[number] for number in numbers]
+
+    @staticmethod
+    def _contains(postings, number):
+        index = bisect.bisect_left(postings, number)
+        return index < len(postings) and postings[index] == number
+
+# --- Session Stores ---
+DEFAULT_SESSION_ID = "default"
+# Keep sessions in this SQLite file instead of process memory (required by prefork.py)
+SESSIONS_DB_ENV_VAR = "CHATBOT_SESSIONS_DB"
+
+class SessionStore:
+    """Base class for per-session ConversationContext storage.
+
+    Subclasses implement _load/_save/_delete; get() always returns a context,
+    creating a fresh one for unknown or expired sessions.
+    """
+
+    def get(self, session_id):
+        context = self._load(session_id)
+        if context is None:
+            context = ConversationContext()
+            self._save(session_id, context)
+        return context
+
+    def save(self, session_id, context):
+        self._save(session_id, context)
+
+    def reset(self, session_id):
+        self._delete(session_id)
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def _load(self, session_id):
+        raise NotImplementedError
+
+    def _save(self, session_id, context):
+        raise NotImplementedError
+
+    def _delete(self, session_id):
+        raise NotImplementedError
+
+class MemorySessionStore(SessionStore):
+    """Bounded in-process store with LRU and idle-TTL eviction"""
+
+    def __init__(self, max_sessions=10000, ttl_seconds=1800):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions = OrderedDict()  # session_id -> (context, last_seen), oldest first
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _evict(self, now):
+        # Least recently used sessions sit at the front, so expired ones do too
+        while self._sessions:
+            _, last_seen = next(iter(self._sessions.values()))
+            if now - last_seen < self.ttl_seconds and len(self._sessions) <= self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+
+    def _load(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            if now - entry[1] >= self.ttl_seconds:
+                del self._sessions[session_id]
+                return None
+            self._sessions[session_id] = (entry[0], now)
+            self._sessions.move_to_end(session_id)
+            return entry[0]
+
+    def _save(self, session_id, context):
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session_id] = (context, now)
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+
+    def _delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+class SQLiteSessionStore(SessionStore):
+    """Local SQLite stand-in for an external (Redis-style) session backend.
+
+    A file path can be shared by several processes (see prefork.py); each
+    process opens its own connection on first use, since SQLite connections
+    must not cross fork(). Requests for one session are serialized within a
+    process only; across processes the last write wins.
+    """
+
+    PURGE_EVERY = 500
+
+    def __init__(self, path=":memory:", max_sessions=100000, ttl_seconds=1800):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._db = None
+        self._pid = None
+        self._inherited = []
+        with self._lock:
+            db = self._connection()
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, data BLOB NOT NULL, last_seen REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS sessions_last_seen ON sessions (last_seen)")
+            db.commit()
+
+    def _connection(self):
+        """This process's connection, opened on first use; call with the lock held"""
+        if self._pid != os.getpid():
+            import sqlite3
+            if self._db is not None:
+                # Inherited across fork(): closing it here could disturb the parent's locks
+                self._inherited.append(self._db)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            # Losing the last few session updates on power loss is acceptable
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._pid = os.getpid()
+        return self._db
+
+    def close(self):
+        """Close this process's connection; the next access reopens it"""
+        with self._lock:
+            if self._db is not None and self._pid == os.getpid():
+                self._db.close()
+            self._db = None
+            self._pid = None
+
+    def __len__(self):
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def _purge(self, db, now):
+        db.execute("DELETE FROM sessions WHERE last_seen < ?", (now - self.ttl_seconds,))
+        db.execute(
+            "DELETE FROM sessions WHERE id NOT IN "
+            "(SELECT id FROM sessions ORDER BY last_seen DESC LIMIT ?)",
+            (self.max_sessions,)
+        )
+
+    def _load(self, session_id):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT data, last_seen FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+        if row is None or time.time() - row[1] >= self.ttl_seconds:
+            return None
+        return pickle.loads(row[0])
+
+    def _save(self, session_id, context):
+        now = time.time()
+        data = pickle.dumps(context, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            db = self._connection()
+            db.execute(
+                "INSERT OR REPLACE INTO sessions (id, data, last_seen) VALUES (?, ?, ?)",
+                (session_id, data, now)
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._purge(db, now)
+            db.commit()
+
+    def _delete(self, session_id):
+        with self._lock:
+            db = self._connection()
+            db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            db.commit()
+
+def session_store_from_env():
+    """SQLiteSessionStore at $CHATBOT_SESSIONS_DB when set, else a MemorySessionStore"""
+    path = os.environ.get(SESSIONS_DB_ENV_VAR)
+    return SQLiteSessionStore(path) if path else MemorySessionStore()
+
+# --- Transcript Log ---
+class TranscriptLog:
+    """Append-only JSONL transcript of every message and reset, written off the request path.
+
+    record() only enqueues; a background thread group-commits the queue to the
+    file every `batch_size` records or `flush_interval` seconds, whichever comes
+    first. Drop policy: the queue holds at most `max_queue` records, and when it
+    is full new records are dropped and counted in `dropped` - a request is
+    never blocked on disk I/O. Records still queued are written by close().
+    """
+
+    def __init__(self, path, batch_size=256, flush_interval=0.05, max_queue=10000, fsync=False):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self._queue = queue.Queue(max_queue)
+        self._stop = object()
+        self._closed = False
+        self._file = self._open()
+        self._start_writer()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _open(self):
+        # Unbuffered append: each batch is a single write(), so processes sharing the file never interleave
+        return open(self.path, "ab", buffering=0)
+
+    def _start_writer(self):
+        self._thread = threading.Thread(target=self._run, name="transcript-writer", daemon=True)
+        self._thread.start()
+
+    def _after_fork(self):
+        """The writer thread does not survive fork(); a child gets its own queue, file and thread.
+        
+        Records queued before the fork stay with the parent.
+        """
+        if self._closed:
+            return
+        self._queue = queue.Queue(self._queue.maxsize)
+        self._file = self._open()
+        self._start_writer()
+
+    def _enqueue(self, entry):
+        if self._closed:
+            self.dropped += 1
+            return
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def record(self, session_id, intent, confidence, entities, user_input):
+        """Queue one answered message"""
+        self._enqueue(("message", time.time(), session_id, intent, confidence, entities,
+                       user_input[:ConversationContext.MAX_INPUT_CHARS]))
+
+    def record_reset(self, session_id):
+        """Queue a context reset, so replay starts that session afresh"""
+        self._enqueue(("reset", time.time(), session_id))
+
+    @staticmethod
+    def _encode(entry):
+        if entry[0] == "reset":
+            record = {"event": "reset", "ts": entry[1], "session": entry[2]}
+        else:
+            _, timestamp, session_id, intent, confidence, entities, user_input = entry
+            record = {"event": "message", "ts": timestamp, "session": session_id, "intent": intent,
+                      "confidence": confidence, "entities": entities, "input": user_input}
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+    def _write(self, batch):
+        self._file.write("".join(self._encode(entry) for entry in batch).encode("utf-8"))
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.written += len(batch)
+        self.batches += 1
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if not batch else max(deadline - time.monotonic(), 0)
+            try:
+                entry = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                entry = None  # flush_interval elapsed
+            if entry is self._stop:
+                if batch:
+                    self._write(batch)
+                return
+            if entry is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(entry)
+                if len(batch) < self.batch_size:
+                    continue
+            try:
+                self._write(batch)
+            except OSError as e:
+                print(f"⚠️ Transcript write failed, {len(batch)} records lost: {e}")
+                self.dropped += len(batch)
+            batch = []
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "queued": self._queue.qsize()
+        }
+
+    def close(self):
+        """Write everything still queued and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(self._stop)
+        self._thread.join()
+        self._file.close()
+
+# Batches from several writer processes interleave, so timestamps in a log are
+# only nearly ordered; seeking to a cutoff backs off by this many seconds
+TRANSCRIPT_CLOCK_SLACK = 60.0
+# Startup replay reads at most this much of the end of the log
+TRANSCRIPT_REPLAY_MAX_BYTES = 32 * 1024 * 1024
+
+def iter_transcript(path, offset=0):
+    """Yield the well-formed records of a transcript log in order, skipping damaged lines.
+    
+    Reading starts at the first whole line at or after byte `offset`.
+    """
+    with open(path, "rb") as f:
+        if offset:
+            f.seek(offset - 1)
+            f.readline()  # the rest of the line `offset` falls in
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(record, dict) or "ts" not in record or "session" not in record:
+                continue
+            if record.get("event") == "reset" or (record.get("event") == "message" and "intent" in record):
+                yield record
+
+def _first_timestamp(f, offset):
+    """Timestamp of the first whole record at or after byte `offset`; None at the end of the file"""
+    f.seek(max(offset - 1, 0))
+    if offset:
+        f.readline()
+    for line in f:
+        try:
+            return float(json.loads(line)["ts"])
+        except (ValueError, TypeError, KeyError):
+            continue
+    return None
+
+def transcript_offset(path, since):
+    """Byte offset from which iter_transcript sees every record of `path` with ts >= since.
+    
+    Bisects the file on record timestamps, so finding the recent end of a
+    large log reads a few dozen lines rather than all of them.
+    """
+    since -= TRANSCRIPT_CLOCK_SLACK
+    with open(path, "rb") as f:
+        low, high = 0, os.fstat(f.fileno()).st_size
+        while high - low > 4096:
+            middle = (low + high) // 2
+            timestamp = _first_timestamp(f, middle)
+            if timestamp is None or timestamp >= since:
+                high = middle
+            else:
+                low = middle
+    return low
+
+def load_transcript(path, since=None, max_bytes=None):
+    """Rebuild the sessions in a transcript log: [(session_id, context, last_seen)], least recent first.
+    
+    Resets start a session afresh; a truncated last line (a crash mid-write) is
+    ignored. With `since`, records older than it are skipped without building
+    any context (a session still active then keeps only its later messages), and
+    with `max_bytes` only that much of the end of the log is read.
+    """
+    contexts = {}  # session_id -> (context, last activity)
+    try:
+        offset = transcript_offset(path, since) if since is not None else 0
+        if max_bytes is not None:
+            offset = max(offset, os.path.getsize(path) - max_bytes)
+        for record in iter_transcript(path, offset):
+            session_id, timestamp = record["session"], record["ts"]
+            if since is not None and timestamp < since:
+                continue
+            if record["event"] == "reset":
+                contexts.pop(session_id, None)
+                continue
+            entry = contexts.get(session_id)
+            context = entry[0] if entry is not None else ConversationContext()
+            context.update(record["intent"], record.get("entities", []), record.get("input", ""), timestamp)
+            contexts[session_id] = (context, timestamp)
+    except FileNotFoundError:
+        return []
+    return sorted(((session_id, context, last_seen) for session_id, (context, last_seen) in contexts.items()),
+                  key=lambda item: item[2])
+
+def replay_transcript(path, sessions, max_bytes=TRANSCRIPT_REPLAY_MAX_BYTES):
+    """Restore sessions from a transcript log into `sessions`; returns the number restored.
+    
+    Only records newer than the store's TTL are read: the log is never rotated,
+    so startup cost follows the traffic of the last TTL (and at most `max_bytes`
+    of the log), not the log's size. Sessions are saved least recently active
+    first so the store's LRU order matches the log.
+    """
+    ttl_seconds = getattr(sessions, "ttl_seconds", None)
+    since = time.time() - ttl_seconds if ttl_seconds is not None else None
+    restored = 0
+    for session_id, context, _ in load_transcript(path, since, max_bytes):
+        sessions.save(session_id, context)
+        restored += 1
+    return restored
+
+# --- Conversation Flow Model ---
+class IntentTransitions:
+    """First-order Markov model of which intent follows which, learned from transcript logs.
+
+    `counts` is an int32 array with one row per previous intent plus a last row
+    for the start of a session, and one column per next intent. Probabilities
+    are add-one smoothed, and the most likely next intents of every row are
+    precomputed, so a prediction is a dict lookup. Requires NumPy.
+    """
+
+    TOP_K = 4
+
+    def __init__(self, intents, counts, smoothing=1.0):
+        try:
+            import numpy as np
+        except ImportError:
+            raise RuntimeError("NumPy is required for intent transitions (pip install numpy)")
+
+        self.intents = list(intents)
+        self.index = {intent: i for i, intent in enumerate(self.intents)}
+        self.counts = np.asarray(counts, dtype=np.int32)
+        if self.counts.shape != (len(self.intents) + 1, len(self.intents)):
+            raise ValueError(f"Expected a {len(self.intents) + 1}x{len(self.intents)} count matrix")
+        smoothed = self.counts + smoothing
+        self.probabilities = (smoothed / smoothed.sum(axis=1, keepdims=True)).astype(np.float32)
+        # Plain lists: single lookups are several times faster than indexing the array
+        self._rows = self.probabilities.tolist()
+        order = np.argsort(-self.probabilities, axis=1, kind="stable")[:, :self.TOP_K]
+        rows = self.intents + [None]
+        self.top_next = {previous: tuple(self.intents[j] for j in order[row]) for row, previous in enumerate(rows)}
+
+    @classmethod
+    def from_transcripts(cls, paths, intents, smoothing=1.0):
+        """Count intent pairs per session across transcript logs; a reset starts the session over"""
+        import numpy as np
+
+        intents = list(intents)
+        index = {intent: i for i, intent in enumerate(intents)}
+        start = len(intents)
+        counts = np.zeros((start + 1, start), dtype=np.int32)
+        for path in paths:
+            last = {}  # session_id -> row of its previous intent
+            for record in iter_transcript(path):
+                session_id = record["session"]
+                if record["event"] == "reset":
+                    last.pop(session_id, None)
+                    continue
+                column = index.get(record["intent"])
+                if column is None:
+                    # An intent the current rules no longer have; start the chain again
+                    last.pop(session_id, None)
+                    continue
+                counts[last.get(session_id, start), column] += 1
+                last[session_id] = column
+        return cls(intents, counts, smoothing)
+
+    def probability(self, previous, intent):
+        """P(intent | previous); `previous` is None at the start of a session"""
+        column = self.index.get(intent)
+        if column is None:
+            return 0.0
+        return self._rows[self.index.get(previous, len(self.intents))][column]
+
+    def predict(self, previous):
+        """The TOP_K most likely intents to follow `previous`, most likely first"""
+        return self.top_next.get(previous, self.top_next[None])
+
+    def save(self, path):
+        import numpy as np
+        with open(path, "wb") as f:
+            np.savez_compressed(f, intents=np.array(self.intents), counts=self.counts)
+
+    @classmethod
+    def load(cls, path, smoothing=1.0):
+        import numpy as np
+        with np.load(path, allow_pickle=False) as data:
+            return cls([str(intent) for intent in data["intents"]], data["counts"], smoothing)
+
+# --- Enhanced Chatbot Class ---
+class ChatbotTables:
+    """Snapshot of everything a request reads; replaced as a whole on reload"""
+    __slots__ = ("profile", "rules", "matcher", "scorer", "transitions", "responses", "follow_up_responses",
+                 "profile_json", "profile_etag")
+
+    def __init__(self, profile, rules, matcher, scorer, transitions, responses, follow_up_responses, profile_json,
+                 profile_etag):
+        self.profile = profile
+        self.rules = rules
+        self.matcher = matcher
+        self.scorer = scorer
+        self.transitions = transitions
+        self.responses = responses
+        self.follow_up_responses = follow_up_responses
+        self.profile_json = profile_json
+        self.profile_etag = profile_etag
+
+class EnhancedChatBot:
+    FOLLOW_UP_SUGGESTIONS = {
+        "skills": ["Would you like to know about his specific projects using these skills?", "Interested in learning about his work experience?"],
+        "projects": ["Would you like to know more about his technical skills?", "Curious about his educational background?"],
+        "experience": ["Want to hear about his notable projects?", "Interested in his future career goals?"],
+        "education": ["Would you like to know about his professional experience?", "Curious about his current projects?"],
+        "recent": ["Want to know about his previous projects?", "Interested in his long-term career goals?"]
+    }
+    NO_FOLLOW_UP_INTENTS = frozenset(["bye", "greet"])
+    # With learned transitions, follow-ups offer the topics most likely to be asked next
+    NEXT_TOPIC_PROMPTS = {
+        "name": "Would you like a quick introduction to who he is?",
+        "role": "Curious about what his current role involves?",
+        "skills": "Interested in his technical skills?",
+        "education": "Curious about his educational background?",
+        "experience": "Interested in learning about his work experience?",
+        "projects": "Want to hear about his notable projects?",
+        "interests": "Would you like to know what he enjoys outside of work?",
+        "recent": "Curious about what he's working on right now?",
+        "contact": "Would you like to know how to get in touch with him?",
+        "goals": "Interested in his long-term career goals?",
+        "tools": "Want to know which tools he works with?",
+        "location": "Would you like to know where he's based?",
+        "certifications": "Curious about his certifications?",
+        "social": "Want links to his professional profiles?"
+    }
+    # A low-confidence detection with runners-up scoring within TRANSITION_MARGIN of
+    # it is re-ranked by rule score + TRANSITION_WEIGHT * P(intent | previous intent)
+    TRANSITION_CONFIDENCE = 0.8
+    TRANSITION_MARGIN = 0.25
+    TRANSITION_WEIGHT = 0.5
+    SESSION_LOCK_STRIPES = 64
+    
+    def __init__(self, profile, matcher=None, sessions=None, rules=None, metrics=None, profiler=None,
+                 semantic_weight=0.0, scorer=None, transcript=None, transitions=None):
+        self.sessions = sessions if sessions is not None else MemorySessionStore()
+        self.transcript = transcript
+        # Weight of TF-IDF similarity blended into the rule scores; 0 disables the scorer
+        self.semantic_weight = semantic_weight
+        self.metrics = metrics if metrics is not None else EngineMetrics()
+        self.profiler = profiler if profiler is not None else ProfileSampler()
+        self._reload_lock = threading.Lock()
+        self._session_locks = [threading.Lock() for _ in range(self.SESSION_LOCK_STRIPES)]
+        if rules is None:
+            rules = matcher.rules if matcher is not None else INTENT_RULES
+        self.tables = self._build_tables(profile, rules, matcher=matcher, scorer=scorer, transitions=transitions)
+    
+    @property
+    def profile(self):
+        return self.tables.profile
+    
+    @property
+    def matcher(self):
+        return self.tables.matcher
+    
+    @property
+    def scorer(self):
+        return self.tables.scorer
+    
+    @property
+    def transitions(self):
+        return self.tables.transitions
+    
+    @property
+    def responses(self):
+        return self.tables.responses
+    
+    def _build_tables(self, profile, rules, previous=None, matcher=None, scorer=None, transitions=None):
+        """Build a ChatbotTables snapshot, reusing whatever is unchanged from `previous`"""
+        if matcher is None:
+            if previous is not None and previous.rules == rules:
+                matcher = previous.matcher
+            else:
+                matcher = IntentMatcher(rules, previous.matcher.compiled if previous is not None else None)
+        
+        if scorer is None and self.semantic_weight > 0:
+            if previous is not None and previous.scorer is not None and previous.rules == rules:
+                scorer = previous.scorer
+            else:
+                scorer = TfidfScorer(rules)
+        
+        if transitions is None and previous is not None:
+            transitions = previous.transitions
+        
+        if previous is not None and previous.profile == profile:
+            responses = previous.responses
+            if previous.transitions is transitions:
+                follow_up_responses = previous.follow_up_responses
+            else:
+                follow_up_responses = self._render_follow_ups(responses, transitions)
+            profile_json, profile_etag = previous.profile_json, previous.profile_etag
+        else:
+            responses = self._intern_table(self._initialize_responses(profile))
+            follow_up_responses = self._render_follow_ups(responses, transitions)
+            profile_json, profile_etag = self._render_profile_json(profile)
+        
+        return ChatbotTables(profile, rules, matcher, scorer, transitions, responses, follow_up_responses,
+                             profile_json, profile_etag)
+    
+    def _render_profile_json(self, profile):
+        """Serialize the /api/profile body once; returns (body, etag).
+        
+        The ETag hashes the profile alone, not the render timestamp, so every
+        process and restart serving the same profile agrees on it.
+        """
+        content = json.dumps(profile, sort_keys=True)
+        body = json.dumps({
+            "status": "success",
+            "profile": profile,
+            "timestamp": datetime.now().isoformat()
+        }, sort_keys=True).encode("utf-8")
+        return body, hashlib.sha1(content.encode("utf-8")).hexdigest()[:20]
+    
+    def reload(self, profile=None, rules=None, transitions=None, matcher=None, scorer=None):
+        """Rebuild what changed and swap the new tables in atomically; returns seconds taken.
+        
+        A `matcher` (and `scorer`) compiled elsewhere is adopted as is, along with its rules.
+        """
+        start_time = time.perf_counter()
+        with self._reload_lock:
+            current = self.tables
+            profile = current.profile if profile is None else profile
+            if rules is None:
+                rules = matcher.rules if matcher is not None else current.rules
+            # A single reference assignment: requests see either the old or the new tables
+            self.tables = self._build_tables(profile, rules, previous=current, matcher=matcher, scorer=scorer,
+                                             transitions=transitions)
+        return time.perf_counter() - start_time
+    
+    def _initialize_responses(self, profile):
+        first_name = profile['name'].split()[0]
+        return {
+            "greet": [
+                f"Hello! I'm {profile['name']}'s AI assistant. How can I help you learn more about him today?",
+                f"Hi there! I'm here to tell you all about {profile['name']}. What would you like to know?",
+                f"Welcome! I'm {profile['name']}'s digital assistant. Ask me anything about his background and expertise!",
+                f"Greetings! I represent {profile['name']}, a passionate {profile['role']}. How may I assist you?"
+            ],
+            "name": [
+                f"His name is {profile['name']}. He's a passionate {profile['role']} with expertise in data analytics and machine learning.",
+                f"I represent {profile['name']}, a skilled {profile['role']} from {profile['location']}.",
+                f"{profile['name']} is a dedicated professional who has transitioned from AI/ML to focus more on data analytics."
+            ],
+            "role": [
+                f"{profile['name']} works as a {profile['role']}. He specializes in transforming raw data into actionable insights for business decisions.",
+                f"He's currently working as a {profile['role']}, focusing on {profile['recent']}.",
+                f"As a {profile['role']}, he combines technical expertise with business acumen to solve complex data problems."
+            ],
+            "skills": [
+                f"{profile['name']} has strong technical skills in: {', '.join(profile['skills'])}. He's particularly skilled in {', '.join(profile['strengths'])}.",
+                f"His technical toolkit includes {', '.join(profile['skills'])}, with additional expertise in {', '.join(profile['tools'])}.",
+                f"He excels in {', '.join(profile['skills'][:3])} and has proven abilities in {', '.join(profile['strengths'])}."
+            ],
+            "education": [
+                f"He completed his {profile['education']}. His academic background in AI/ML provides a strong foundation for his current analytics work.",
+                f"{profile['name']} holds a {profile['education']}, which gives him deep technical knowledge in artificial intelligence and machine learning."
+            ],
+            "experience": [
+                f"{profile['name']} has {profile['experience']}. His background combines both research and industry experience, giving him a unique perspective on data problems.",
+                f"With {profile['experience']}, he has worked on various challenging projects spanning different domains.",
+                f"His professional journey includes {profile['experience']}, providing him with both theoretical knowledge and practical skills."
+            ],
+            "projects": [
+                f"Some of his notable projects include: {', '.join(profile['projects'])}. Each project demonstrates his ability to solve real-world problems using data analysis.",
+                f"His project portfolio showcases diverse applications: {', '.join(profile['projects'][:3])}, and more. Would you like to know details about any specific project?",
+                f"He has worked on impactful projects like {', '.join(profile['projects'][:2])}, showcasing his versatility in data science applications."
+            ],
+            "interests": [
+                f"He's passionate about {', '.join(profile['interests'])}. These interests drive him to continuously learn and improve his analytical skills.",
+                f"{profile['name']} enjoys {', '.join(profile['interests'])}, which keeps him updated with the latest trends in data science."
+            ],
+            "recent": [
+                f"Currently, {profile['recent']}. This shift allows him to focus more on business impact and strategic decision-making.",
+                f"His recent focus is on {profile['recent']}, which aligns with industry demand for strong analytical skills."
+            ],
+            "contact": [
+                f"{profile['name']} is {profile['contact']}. He's always interested in challenging data problems and innovative analytics solutions.",
+                f"You can reach out to him for collaborations - he's {profile['contact']}."
+            ],
+            "goals": [
+                f"His career goal is {profile['goals']}. He's constantly working on improving his skills and taking on more leadership responsibilities.",
+                f"{profile['name']} aims {profile['goals']}, focusing on both technical excellence and leadership development."
+            ],
+            "tools": [
+                f"He regularly works with {', '.join(profile['tools'])} for development and data analysis tasks.",
+                f"His preferred development environment includes {', '.join(profile['tools'])}, ensuring efficient and productive workflows."
+            ],
+            "location": [
+                f"He's based in {profile['location']} and is open to both local and remote opportunities.",
+                f"{profile['name']} is located in {profile['location']} but works with clients globally."
+            ],
+            "certifications": [
+                f"He has earned certifications in {', '.join(profile['certifications'])}, validating his expertise in data analysis.",
+                f"His professional credentials include {', '.join(profile['certifications'])}, demonstrating his commitment to continuous learning."
+            ],
+            "social": [
+                f"You can find his professional profile on LinkedIn: {profile.get('linkedin', 'Available upon request')}",
+                f"Check out his work on GitHub: {profile.get('github', 'Available upon request')} and his portfolio: {profile.get('portfolio', 'Available upon request')}"
+            ],
+            "bye": [
+                f"Thank you for your interest in {first_name}'s profile! Feel free to come back anytime to learn more.",
+                f"Goodbye! Don't hesitate to reach out if you want to know more about {first_name}'s work and expertise.",
+                f"It was great chatting with you! Come back anytime to learn more about {first_name}'s professional journey."
+            ],
+            "fallback": [
+                f"I'd be happy to tell you more about {first_name}. You can ask about his skills, projects, experience, or current work.",
+                f"That's an interesting question! While I might not have specific details on that, I can tell you about {first_name}'s background, skills, or recent projects.",
+                f"Let me help you learn more about {first_name}. Try asking about his technical skills, work experience, or recent projects.",
+                f"I'm here to share information about {first_name}'s professional profile. What specific aspect would you like to know about?"
+            ]
+        }
+    
+    def _intern_table(self, table):
+        """Intern every template so each response string exists exactly once"""
+        return {intent: [sys.intern(text) for text in texts] for intent, texts in table.items()}
+    
+    def _render_follow_ups(self, table, transitions=None):
+        """Pre-render every response + follow-up pairing so selection does no concatenation"""
+        suggestions = self.FOLLOW_UP_SUGGESTIONS
+        if transitions is not None:
+            suggestions = {}
+            for intent in self.NEXT_TOPIC_PROMPTS:
+                likely = [self.NEXT_TOPIC_PROMPTS[following] for following in transitions.predict(intent)
+                          if following != intent and following in self.NEXT_TOPIC_PROMPTS]
+                if likely:
+                    suggestions[intent] = likely[:2]
+        rendered = {}
+        for intent, follow_ups in suggestions.items():
+            if intent in self.NO_FOLLOW_UP_INTENTS:
+                continue
+            responses = table.get(intent, table["fallback"])
+            rendered[intent] = [
+                sys.intern(f"{response}\n\n{follow_up}") for response in responses for follow_up in follow_ups
+            ]
+        return rendered
+    
+    def detect_intent(self, message, include_reasoning=True, tables=None, similarities=None):
+        """Advanced intent detection with confidence scoring and entity extraction.
+        
+        `similarities` are precomputed TF-IDF scores for the message (see process_batch).
+        """
+        tables = tables or self.tables
+        chain_of_thought = []
+        if include_reasoning:
+            chain_of_thought.append("🔍 Analyzing user input for intent patterns...")
+        
+        normalized_message = message.lower().strip()
+        
+        # Intent detection (single pass over the message)
+        similarity = None
+        if tables.scorer is not None:
+            best_intent, max_score, matched_patterns, extracted_entities, similarity = tables.scorer.blend(
+                tables.matcher, normalized_message, self.semantic_weight, similarities)
+        else:
+            best_intent, max_score, matched_patterns, extracted_entities = tables.matcher.best(normalized_message)
+        corrections = ()
+        if max_score == 0:
+            # Nothing matched exactly; retry with typos corrected
+            best_intent, max_score, matched_patterns, extracted_entities, corrections = \
+                tables.matcher.best_fuzzy(normalized_message)
+        
+        # Calculate confidence
+        confidence = min(max_score * 0.8, 0.95) if max_score > 0 else 0.3
+        
+        # A low-confidence near tie is settled once the session's previous intent is known
+        candidates = None
+        if tables.transitions is not None and not corrections and 0 < confidence < self.TRANSITION_CONFIDENCE:
+            candidates = tables.matcher.near_ties(normalized_message, self.TRANSITION_MARGIN)
+            if best_intent not in candidates:
+                candidates = None
+        
+        if include_reasoning:
+            if corrections:
+                fixed = ", ".join(f"'{word}' → '{corrected}'" for word, corrected in corrections)
+                chain_of_thought.append(f"🔤 Corrected likely typos: {fixed}")
+            if similarity is not None:
+                chain_of_thought.append(f"🧮 Semantic similarity: {similarity:.2f} (weight {self.semantic_weight:g})")
+            chain_of_thought.append(f"🎯 Best match: '{best_intent}' (confidence: {confidence:.0%})")
+            
+            if matched_patterns:
+                chain_of_thought.append(f"📝 Matched {len(matched_patterns)} pattern(s)")
+            
+            if extracted_entities:
+                chain_of_thought.append(f"🏷️ Extracted entities: {', '.join(extracted_entities)}")
+        
+        return {
+            "intent": best_intent,
+            "confidence": confidence,
+            "entities": extracted_entities,
+            "matched_patterns": matched_patterns,
+            "chain_of_thought": chain_of_thought,
+            "candidates": candidates
+        }
+    
+    def _follow_conversation(self, detection_result, previous_intent, tables, include_reasoning=True):
+        """Settle a near tie in favour of the candidate that most often follows `previous_intent`"""
+        candidates = detection_result["candidates"]
+        transitions = tables.transitions
+        weighted = {
+            intent: score + self.TRANSITION_WEIGHT * transitions.probability(previous_intent, intent)
+            for intent, (score, _) in candidates.items()
+        }
+        intent = max(weighted, key=weighted.get)
+        result = dict(detection_result, candidates=None)
+        if intent != detection_result["intent"]:
+            score, matched_patterns = candidates[intent]
+            result.update(intent=intent, confidence=min(score * 0.8, 0.95), matched_patterns=matched_patterns,
+                          entities=tables.rules[intent]["entities"])
+            if include_reasoning:
+                probability = transitions.probability(previous_intent, intent)
+                result["chain_of_thought"] = detection_result["chain_of_thought"] + [
+                    f"🔗 Near tie settled by conversation flow: '{intent}' over '{detection_result['intent']}' "
+                    f"(p={probability:.2f} after '{previous_intent or 'start'}')"
+                ]
+        return result
+    
+    def generate_contextual_response(self, intent, message, context, include_reasoning=True, tables=None):
+        """Generate contextually aware responses"""
+        tables = tables or self.tables
+        chain_of_thought = []
+        if include_reasoning:
+            chain_of_thought.append("🧠 Analyzing conversation context...")
+        
+        # Get base responses for the intent
+        responses = tables.responses.get(intent, tables.responses["fallback"])
+        
+        # Context-aware response selection
+        if include_reasoning and context.conversation_count > 0:
+            # Avoid repeating recent responses
+            recent_intents = context.recent_intents(3)
+            if intent in recent_intents and len(responses) > 1:
+                chain_of_thought.append("🔄 Selecting varied response to avoid repetition")
+        
+        # Add follow-up suggestions based on context; every response/follow-up
+        # pairing is pre-rendered, so picking one uniformly matches picking each part
+        if context.conversation_count > 2 and intent in tables.follow_up_responses:
+            responses = tables.follow_up_responses[intent]
+        
+        # Select response
+        enhanced_response = random.choice(responses)
+        
+        if include_reasoning:
+            chain_of_thought.append("✨ Applied contextual enhancements")
+            chain_of_thought.append("✅ Response generated successfully!")
+        
+        return enhanced_response, chain_of_thought
+    
+    def process_message(self, message, session_id=DEFAULT_SESSION_ID, include_reasoning=True):
+        """Main method to process user message and generate response"""
+        start_ns = time.perf_counter_ns()
+        sampled = self.profiler.begin()
+        # A failing request must not leave the profiler enabled for everything after it
+        try:
+            tables = self.tables
+            
+            # Detect intent and extract information
+            detection_result = self.detect_intent(message, include_reasoning, tables)
+            detected_ns = time.perf_counter_ns()
+            
+            # Concurrent requests for the same session update its context one at a time
+            with self._session_lock(session_id):
+                store_start_ns = time.perf_counter_ns()
+                context = self.sessions.get(session_id)
+                store_ns = time.perf_counter_ns() - store_start_ns
+                result = self._respond(message, detection_result, context, start_ns, include_reasoning, tables,
+                                       session_id)
+                store_start_ns = time.perf_counter_ns()
+                self.sessions.save(session_id, context)
+                end_ns = time.perf_counter_ns()
+                store_ns += end_ns - store_start_ns
+        finally:
+            self.profiler.end(sampled)
+        
+        intent = result["intent"]
+        self.metrics.observe("detect", intent, detected_ns - start_ns)
+        self.metrics.observe("session_store", intent, store_ns)
+        self.metrics.observe("total", intent, end_ns - start_ns)
+        return result
+    
+    def stream_message(self, message, session_id=DEFAULT_SESSION_ID, include_reasoning=True):
+        """Generator form of process_message yielding (event, data) as each stage finishes.
+        
+        Yields "intent" as soon as detection is done, then one "thought" per
+        chain-of-thought step, then "response". Nothing is yielded while the
+        session lock is held, so a slow reader never blocks other requests for
+        the session. A reader that stops before "response" leaves the session
+        untouched. Streams are not sampled by the profiler, which would stay
+        enabled while the generator is suspended.
+        """
+        start_ns = time.perf_counter_ns()
+        tables = self.tables
+        detection_result = self.detect_intent(message, include_reasoning, tables)
+        if detection_result["candidates"]:
+            # Settle a near tie now, so the intent event matches the response
+            with self._session_lock(session_id):
+                previous_intent = self.sessions.get(session_id).last_intent
+            detection_result = self._follow_conversation(detection_result, previous_intent, tables,
+                                                         include_reasoning)
+        detected_ns = time.perf_counter_ns()
+        intent = detection_result["intent"]
+        self.metrics.observe("detect", intent, detected_ns - start_ns)
+        yield "intent", {"intent": intent, "confidence": detection_result["confidence"]}
+        
+        detection_steps = len(detection_result["chain_of_thought"])
+        for step in detection_result["chain_of_thought"]:
+            yield "thought", step
+        
+        resumed_ns = time.perf_counter_ns()
+        with self._session_lock(session_id):
+            context = self.sessions.get(session_id)
+            result = self._respond(message, detection_result, context, resumed_ns, include_reasoning, tables,
+                                   session_id)
+            self.sessions.save(session_id, context)
+        end_ns = time.perf_counter_ns()
+        # Time spent suspended at a yield belongs to the reader, not to the engine
+        result["processing_time"] = (end_ns - resumed_ns + detected_ns - start_ns) / 1e9
+        self.metrics.observe("total", intent, end_ns - resumed_ns + detected_ns - start_ns)
+        
+        for step in result["chain_of_thought"][detection_steps:]:
+            yield "thought", step
+        yield "response", result
+    
+    def process_batch(self, messages, session_id=None, include_reasoning=True):
+        """Process many messages in one call, returning results in input order.
+        
+        Intent detection runs once per distinct normalized message and is shared
+        across duplicates. Without a session_id the batch is classified against a
+        throwaway context; with one, messages are applied to that session in order.
+        """
+        tables = self.tables
+        detections = {}
+        keys = [message.lower().strip() for message in messages]
+        similarities = None
+        if tables.scorer is not None:
+            # One matrix product scores every distinct message against every intent
+            distinct = list(dict.fromkeys(keys))
+            similarities = dict(zip(distinct, tables.scorer.score_batch(distinct)))
+        for message, key in zip(messages, keys):
+            if key not in detections:
+                start_ns = time.perf_counter_ns()
+                detection_result = detections[key] = self.detect_intent(
+                    message, include_reasoning, tables, similarities[key] if similarities is not None else None)
+                self.metrics.observe("detect", detection_result["intent"], time.perf_counter_ns() - start_ns)
+        
+        if session_id is None:
+            return self._respond_all(messages, keys, detections, ConversationContext(), include_reasoning, tables)
+        with self._session_lock(session_id):
+            context = self.sessions.get(session_id)
+            results = self._respond_all(messages, keys, detections, context, include_reasoning, tables, session_id)
+            self.sessions.save(session_id, context)
+        return results
+    
+    def _respond_all(self, messages, keys, detections, context, include_reasoning, tables, session_id=None):
+        results = []
+        for message, key in zip(messages, keys):
+            start_ns = time.perf_counter_ns()
+            detection_result = detections[key]
+            detection_result = dict(detection_result, chain_of_thought=list(detection_result["chain_of_thought"]))
+            result = self._respond(message, detection_result, context, start_ns, include_reasoning, tables,
+                                   session_id)
+            self.metrics.observe("total", result["intent"], time.perf_counter_ns() - start_ns)
+            results.append(result)
+        return results
+    
+    def reset_session(self, session_id):
+        """Forget a session's context"""
+        self.sessions.reset(session_id)
+        if self.transcript is not None:
+            self.transcript.record_reset(session_id)
+    
+    def _session_lock(self, session_id):
+        return self._session_locks[hash(session_id) % len(self._session_locks)]
+    
+    def _respond(self, message, detection_result, context, start_ns, include_reasoning=True, tables=None,
+                 session_id=None):
+        """Generate the response for a detected intent and record it in the context (and transcript)"""
+        tables = tables or self.tables
+        if detection_result.get("candidates"):
+            detection_result = self._follow_conversation(detection_result, context.last_intent, tables,
+                                                         include_reasoning)
+        intent = detection_result["intent"]
+        confidence = detection_result["confidence"]
+        entities = detection_result["entities"]
+        chain_of_thought = detection_result["chain_of_thought"]
+        
+        # Generate contextual response
+        respond_start_ns = time.perf_counter_ns()
+        if include_reasoning:
+            chain_of_thought.append("💡 Generating contextual response...")
+        response, additional_thoughts = self.generate_contextual_response(intent, message, context, include_reasoning, tables)
+        chain_of_thought.extend(additional_thoughts)
+        
+        # Update context
+        context_start_ns = time.perf_counter_ns()
+        context.update(intent, entities, message)
+        if self.transcript is not None and session_id is not None:
+            self.transcript.record(session_id, intent, confidence, entities, message)
+        end_ns = time.perf_counter_ns()
+        self.metrics.observe("respond", intent, context_start_ns - respond_start_ns)
+        self.metrics.observe("context", intent, end_ns - context_start_ns)
+        
+        processing_time = (end_ns - start_ns) / 1e9
+        if include_reasoning:
+            chain_of_thought.append(f"⚡ Processing completed in {processing_time:.3f}s")
+        
+        return {
+            "response": response,
+            "intent": intent,
+            "confidence": confidence,
+            "entities": entities,
+            "chain_of_thought": chain_of_thought,
+            "processing_time": processing_time,
+            "conversation_count": context.conversation_count,
+            "predicted_next": list(tables.transitions.predict(intent)) if tables.transitions is not None else []
+        }
+
+# --- Hot-Reloadable Configuration ---
+CONFIG_ENV_VAR = "CHATBOT_CONFIG"
+# Profile fields the response templates read: text, and lists that are joined
+PROFILE_TEXT_FIELDS = ("name", "role", "education", "experience", "recent", "location", "contact", "goals")
+PROFILE_LIST_FIELDS = ("skills", "projects", "interests", "strengths", "tools", "certifications")
+
+def load_config(path):
+    """Load (profile, intent_rules) from a JSON or YAML file; either may be None"""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError("PyYAML is required for YAML config files (pip install pyyaml)")
+            config = yaml.safe_load(f)
+        else:
+            config = json.load(f)
+    
+    if not isinstance(config, dict):
+        raise ValueError(f"{path}: expected a mapping with 'profile' and/or 'intent_rules'")
+    
+    profile = config.get("profile")
+    rules = config.get("intent_rules")
+    if profile is not None:
+        if not isinstance(profile, dict):
+            raise ValueError(f"{path}: 'profile' must be a mapping")
+        missing = [field for field in PROFILE_TEXT_FIELDS + PROFILE_LIST_FIELDS if field not in profile]
+        if missing:
+            raise ValueError(f"{path}: 'profile' is missing {', '.join(missing)}")
+        for field in PROFILE_TEXT_FIELDS:
+            if not isinstance(profile[field], str) or not profile[field].strip():
+                raise ValueError(f"{path}: profile '{field}' must be a non-empty string")
+        for field in PROFILE_LIST_FIELDS:
+            if not isinstance(profile[field], list) or not all(isinstance(item, str) for item in profile[field]):
+                raise ValueError(f"{path}: profile '{field}' must be a list of strings")
+    if rules is not None:
+        if not isinstance(rules, dict):
+            raise ValueError(f"{path}: 'intent_rules' must be a mapping")
+        for intent, rule in rules.items():
+            if not isinstance(rule, dict) or not isinstance(rule.get("patterns"), list) \
+                    or not isinstance(rule.get("weight"), (int, float)) or not isinstance(rule.get("entities"), list):
+                raise ValueError(f"{path}: intent '{intent}' needs 'patterns', 'weight' and 'entities'")
+    return profile, rules
+
+def export_config(path, profile=PROFILE, rules=INTENT_RULES):
+    """Write the built-in profile and rules out as a starting config file"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"profile": profile, "intent_rules": rules}, f, indent=2, ensure_ascii=False)
+
+class ConfigWatcher:
+    """Polls a config file's mtime and hot-reloads a chatbot when it changes"""
+
+    def __init__(self, path, chatbot, poll_interval=2.0):
+        self.path = path
+        self.chatbot = chatbot
+        self.poll_interval = poll_interval
+        self.last_reload_seconds = None
+        self._mtime = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self):
+        """Reload if the file changed since the last check; returns True when reloaded"""
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self._mtime:
+            return False
+        # Remember the mtime first so a broken file is reported once, not every poll
+        self._mtime = mtime
+        profile, rules = load_config(self.path)
+        self.last_reload_seconds = self.chatbot.reload(profile, rules)
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                if self.check():
+                    print(f"🔄 Reloaded {self.path} in {self.last_reload_seconds * 1000:.1f}ms")
+            except Exception as e:
+                # Keep serving the last good tables until the file is fixed
+                print(f"⚠️ Config reload failed: {e}")
+
+    def start(self):
+        """Load the file if it changed since the last check, then poll it in a thread"""
+        if self._thread is not None:
+            return self
+        self.check()
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+# --- Multi-Profile Registry ---
+PROFILES_DIR_ENV_VAR = "CHATBOT_PROFILES_DIR"
+PROFILE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+def profile_file_loader(directory):
+    """Return a loader that reads `<directory>/<profile_id>.json` (or .yaml/.yml).
+    
+    A file that cannot be loaded counts as unknown; its error is printed once per version of the file.
+    """
+    reported = set()  # (path, mtime) of broken files already reported
+
+    def load(profile_id):
+        for extension in (".json", ".yaml", ".yml"):
+            path = os.path.join(directory, profile_id + extension)
+            if os.path.exists(path):
+                try:
+                    profile, _ = load_config(path)
+                except (OSError, ValueError, RuntimeError) as e:
+                    version = (path, os.stat(path).st_mtime_ns)
+                    if version not in reported:
+                        reported.add(version)
+                        print(f"⚠️ Profile {profile_id} not loaded: {e}")
+                    return None
+                return profile
+        return None
+    return load
+
+class ProfileRegistry:
+    """Lazily loads one EnhancedChatBot per profile ID and evicts the least recently used.
+
+    Every bot shares the same compiled IntentMatcher (and TfidfScorer and IntentTransitions), session store
+    and metrics; only the per-profile response tables are built for each profile. With a `source` bot,
+    tenants follow its current matcher, scorer and transitions, so they pick up its hot reloads.
+    Unknown or broken profile IDs are remembered for `unknown_ttl` seconds, so repeated requests
+    for them do not hit the loader; a newly added profile is served within that delay.
+    """
+
+    UNKNOWN_TTL = 10.0
+
+    def __init__(self, loader, matcher, sessions, max_profiles=1000, metrics=None, profiler=None,
+                 semantic_weight=0.0, scorer=None, transcript=None, transitions=None, source=None,
+                 unknown_ttl=UNKNOWN_TTL):
+        self.loader = loader
+        self.unknown_ttl = unknown_ttl
+        self.source = source
+        self.transcript = transcript
+        self.matcher = matcher
+        self.semantic_weight = semantic_weight
+        self.scorer = scorer
+        self.transitions = transitions
+        self.sessions = sessions
+        self.metrics = metrics
+        self.profiler = profiler
+        self.max_profiles = max_profiles
+        self._bots = OrderedDict()
+        self._unknown = OrderedDict()  # profile_id -> monotonic time until which it counts as unknown
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._bots)
+
+    def shared(self):
+        """The (matcher, scorer, transitions) every tenant should be using right now"""
+        if self.source is not None:
+            tables = self.source.tables
+            return tables.matcher, tables.scorer, tables.transitions
+        return self.matcher, self.scorer, self.transitions
+
+    def get(self, profile_id):
+        """Return the chatbot for profile_id, loading it on first use; None if unknown"""
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        matcher, scorer, transitions = self.shared()
+        now = time.monotonic()
+        with self._lock:
+            bot = self._bots.get(profile_id)
+            if bot is not None:
+                self._bots.move_to_end(profile_id)
+            elif self._unknown.get(profile_id, 0) > now:
+                return None
+        if bot is not None:
+            # A new matcher means the shared rules were reloaded since this bot was built
+            if bot.tables.matcher is not matcher:
+                bot.reload(matcher=matcher, scorer=scorer, transitions=transitions)
+            return bot
+        
+        profile = self.loader(profile_id)
+        if profile is None:
+            with self._lock:
+                self._unknown[profile_id] = now + self.unknown_ttl
+                self._unknown.move_to_end(profile_id)
+                while len(self._unknown) > self.max_profiles:
+                    self._unknown.popitem(last=False)
+            return None
+        bot = EnhancedChatBot(profile, matcher=matcher, sessions=self.sessions,
+                              metrics=self.metrics, profiler=self.profiler,
+                              semantic_weight=self.semantic_weight, scorer=scorer,
+                              transcript=self.transcript, transitions=transitions)
+        
+        with self._lock:
+            # Another request may have loaded it meanwhile; keep the first one
+            bot = self._bots.setdefault(profile_id, bot)
+            self._bots.move_to_end(profile_id)
+            while len(self._bots) > self.max_profiles:
+                self._bots.popitem(last=False)
+        return bot
+
+    def evict(self, profile_id):
+        with self._lock:
+            self._bots.pop(profile_id, None)
+            self._unknown.pop(profile_id, None)
@@ -1,425 +1,329 @@
-import re
+"""Enhanced Chatbot API and command line.
+
+The engine lives in chatbot_core.py. This module creates the default bot, the
+framework-independent request handlers shared with asgi_app.py, the Flask app
+and the console. Flask is imported only when the app is created, so console
+mode and the CLI tools never load it.
+
+    python enhanced_chatbot.py                                              # Flask development server
+    python enhanced_chatbot.py console [--quiet] [--json]                   # chat in the terminal, or answer piped questions
+    python enhanced_chatbot.py export-config <path>                         # dump the profile and rules
+    python enhanced_chatbot.py compile-rules <path>                         # precompile the intent rules
+    python enhanced_chatbot.py replay-transcript <path>                     # summarize a transcript log
+    python enhanced_chatbot.py learn-transitions <out.npz> <transcript>...  # learn intent transitions
+"""
+import os
+import sys
 import json
-import random
+import math
 import time
+import atexit
 from datetime import datetime
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-
-# --- Enhanced Profile Database ---
-PROFILE = {
-    "name": "Anand Dubey",
-    "role": "Data Analyst",
-    "skills": ["Python", "Excel", "SQL", "Power BI", "Tableau"],
-    "education": "B.Tech in AIML from Bennett University",
-    "experience": "1+ year research internship, 7+ months industry experience",
-    "projects": ["EV Sales Analysis", "Credit Risk Prediction", "TSP Genetic Algorithm", "Healthcare Symptom Checker", "Visit Velocity Analysis"],
-    "interests": ["Data Analysis", "Data Engineering", "Hackathons", "Resume Projects"],
-    "recent": "Working as Data Analyst and shifting focus from AI/ML to core analytics",
-    "location": "India",
-    "contact": "Available for freelance projects and collaborations",
-    "strengths": ["Problem Solving", "Analytical Thinking", "Data Visualization", "Statistical Analysis"],
-    "tools": ["Jupyter Notebook", "VS Code", "Git", "Docker", "AWS"],
-    "certifications": ["Data Analysis Specialization", "Python for Data Science"],
-    "goals": "To become a senior data analyst and eventually lead data science teams",
-    "linkedin": "https://linkedin.com/in/anand-dubey",
-    "github": "https://github.com/anand-dubey",
-    "portfolio": "https://anand-dubey-portfolio.com"
-}
-
-# --- Advanced Intent Rules with Confidence Scoring ---
-INTENT_RULES = {
-    "greet": {
-        "patterns": [r"\bhello\b", r"\bhi\b", r"\bhey\b", r"\bstart\b", r"\bgood morning\b", r"\bgood evening\b"],
-        "weight": 1.0,
-        "entities": []
-    },
-    "name": {
-        "patterns": [r"your name", r"who are you", r"introduce yourself", r"about yourself", r"tell me about you"],
-        "weight": 0.9,
-        "entities": ["name", "identity"]
-    },
-    "role": {
-        "patterns": [r"what do you do", r"your job", r"your position", r"work as", r"profession", r"occupation"],
-        "weight": 0.8,
-        "entities": ["job", "role", "position"]
-    },
-    "skills": {
-        "patterns": [r"your skills", r"what can you do", r"technologies", r"programming", r"technical skills", r"expertise"],
-        "weight": 0.9,
-        "entities": ["skills", "technology", "programming"]
-    },
-    "education": {
-        "patterns": [r"education", r"college", r"university", r"degree", r"study", r"qualification", r"academic"],
-        "weight": 0.8,
-        "entities": ["education", "degree", "university"]
-    },
-    "experience": {
-        "patterns": [r"experience", r"worked", r"background", r"career", r"professional", r"work history"],
-        "weight": 0.9,
-        "entities": ["experience", "work", "career"]
-    },
-    "projects": {
-        "patterns": [r"projects", r"portfolio", r"built", r"created", r"developed", r"work samples"],
-        "weight": 0.9,
-        "entities": ["projects", "portfolio", "work"]
-    },
-    "interests": {
-        "patterns": [r"interests", r"hobbies", r"passion", r"like", r"enjoy", r"personal interests"],
-        "weight": 0.7,
-        "entities": ["interests", "hobbies", "passion"]
-    },
-    "recent": {
-        "patterns": [r"currently", r"now", r"latest", r"recent", r"working on", r"current work"],
-        "weight": 0.8,
-        "entities": ["current", "recent", "now"]
-    },
-    "contact": {
-        "patterns": [r"contact", r"reach", r"hire", r"collaborate", r"freelance", r"get in touch"],
-        "weight": 0.8,
-        "entities": ["contact", "hire", "collaborate"]
-    },
-    "goals": {
-        "patterns": [r"goals", r"future", r"ambition", r"plan", r"aspire", r"aim", r"career goals"],
-        "weight": 0.7,
-        "entities": ["goals", "future", "ambition"]
-    },
-    "tools": {
-        "patterns": [r"tools", r"software", r"applications", r"use", r"work with", r"technologies"],
-        "weight": 0.7,
-        "entities": ["tools", "software", "applications"]
-    },
-    "location": {
-        "patterns": [r"where", r"location", r"based", r"from", r"live", r"country"],
-        "weight": 0.6,
-        "entities": ["location", "place", "where"]
-    },
-    "certifications": {
-        "patterns": [r"certifications", r"certificates", r"certified", r"credentials", r"qualifications"],
-        "weight": 0.7,
-        "entities": ["certifications", "credentials"]
-    },
-    "social": {
-        "patterns": [r"linkedin", r"github", r"portfolio", r"social", r"profile", r"website"],
-        "weight": 0.8,
-        "entities": ["social", "profile", "portfolio"]
-    },
-    "bye": {
-        "patterns": [r"\bbye\b", r"goodbye", r"see you", r"talk later", r"exit", r"quit"],
-        "weight": 1.0,
-        "entities": []
+
+from chatbot_core import (
+    CONFIG_ENV_VAR, INTENT_RULES, PROFILE, PROFILES_DIR_ENV_VAR, AdmissionController, ConfigWatcher, EnhancedChatBot,
+    IntentMatcher, IntentTransitions, ProfileRegistry, QuestionHistory, TokenBucketLimiter, TranscriptLog, export_config,
+    load_matcher, load_transcript, profile_file_loader, replay_transcript, save_matcher, session_store_from_env
+)
+# The engine used to live in this module; keep its public names importable from here
+from chatbot_core import (  # noqa: F401
+    DEFAULT_SESSION_ID, ConversationContext, EngineMetrics, FuzzyIndex, LRUCache, MemorySessionStore,
+    ProfileSampler, SQLiteSessionStore, TfidfScorer, load_config
+)
+
+# --- Shared Request Handling ---
+# Framework-independent handlers used by both the Flask app below and asgi_app.py.
+# Each *_payload function returns (payload, status_code).
+
+# Blend TF-IDF similarity into the rule scores with this weight (needs NumPy)
+SEMANTIC_WEIGHT_ENV_VAR = "CHATBOT_SEMANTIC_WEIGHT"
+# Append every message to this JSONL transcript, and restore sessions from it at startup
+TRANSCRIPT_ENV_VAR = "CHATBOT_TRANSCRIPT"
+# Load the compiled intent rules from this pickle, (re)writing it when the rules change
+RULES_CACHE_ENV_VAR = "CHATBOT_RULES_CACHE"
+# Intent transition model (from `learn-transitions`) used for near ties and follow-up suggestions
+TRANSITIONS_ENV_VAR = "CHATBOT_TRANSITIONS"
+# Per-client rate limit for the chat endpoints as "rate[/burst]" requests per second, e.g. "5/20"
+RATE_LIMIT_ENV_VAR = "CHATBOT_RATE_LIMIT"
+# Answer 503 once this many chat requests are in flight (0 disables the cap)
+MAX_INFLIGHT_ENV_VAR = "CHATBOT_MAX_INFLIGHT"
+# Messages are cut to this many characters before intent detection (0 disables the limit)
+MAX_MESSAGE_LENGTH_ENV_VAR = "CHATBOT_MAX_MESSAGE_LENGTH"
+
+# Initialize chatbot
+chatbot = EnhancedChatBot(
+    PROFILE,
+    matcher=load_matcher(INTENT_RULES, os.environ.get(RULES_CACHE_ENV_VAR)),
+    sessions=session_store_from_env(),
+    semantic_weight=float(os.environ.get(SEMANTIC_WEIGHT_ENV_VAR, 0)),
+    transitions=IntentTransitions.load(os.environ[TRANSITIONS_ENV_VAR]) if os.environ.get(TRANSITIONS_ENV_VAR) else None
+)
+
+if os.environ.get(TRANSCRIPT_ENV_VAR):
+    # Restore conversations from the log before appending to it
+    restored = replay_transcript(os.environ[TRANSCRIPT_ENV_VAR], chatbot.sessions)
+    print(f"📼 Restored {restored} session(s) from {os.environ[TRANSCRIPT_ENV_VAR]}")
+    chatbot.transcript = TranscriptLog(os.environ[TRANSCRIPT_ENV_VAR])
+    atexit.register(chatbot.transcript.close)
+
+# Additional profiles served under /api/<profile_id>/..., following the default bot's
+# matcher, scorer and transitions through hot reloads
+profiles = ProfileRegistry(
+    profile_file_loader(os.environ.get(PROFILES_DIR_ENV_VAR, "profiles")),
+    matcher=chatbot.matcher,
+    sessions=chatbot.sessions,
+    metrics=chatbot.metrics,
+    profiler=chatbot.profiler,
+    semantic_weight=chatbot.semantic_weight,
+    transcript=chatbot.transcript,
+    source=chatbot
+)
+
+config_watcher = None
+
+def start_config_watcher(poll=True):
+    """Serve the profile/rules in CHATBOT_CONFIG, if set, and hot-reload them on change.
+
+    The polling thread does not survive a fork: a pre-fork parent loads the file
+    with poll=False, and each worker calls this again to poll from the parent's state.
+    """
+    global config_watcher
+    if not os.environ.get(CONFIG_ENV_VAR):
+        return None
+    if config_watcher is None:
+        config_watcher = ConfigWatcher(os.environ[CONFIG_ENV_VAR], chatbot)
+        config_watcher.check()
+    if poll:
+        config_watcher.start()
+    return config_watcher
+
+def admission_from_env():
+    """Build the chat endpoints' AdmissionController from the environment"""
+    limiter = None
+    if os.environ.get(RATE_LIMIT_ENV_VAR):
+        rate, _, burst = os.environ[RATE_LIMIT_ENV_VAR].partition("/")
+        limiter = TokenBucketLimiter(float(rate), float(burst) if burst else None)
+    return AdmissionController(
+        limiter,
+        max_inflight=int(os.environ.get(MAX_INFLIGHT_ENV_VAR, 256)),
+        max_message_length=int(os.environ.get(MAX_MESSAGE_LENGTH_ENV_VAR, 1000))
+    )
+
+admission = admission_from_env()
+
+SESSION_COOKIE = "chat_session_id"
+# Session keys are namespaced per bot: "<profile_id>:<session_id>" for tenants, and a
+# prefix no profile ID can produce for the default bot, so client IDs never collide
+DEFAULT_SCOPE = "@default:"
+SESSION_HEADER = "X-Session-ID"
+MAX_BATCH_SIZE = 1000
+# Larger request bodies are refused before they are read or parsed, in both apps
+MAX_BODY_BYTES = 1024 * 1024
+
+# Runtime profiling controls are only available when an admin token is configured
+ADMIN_TOKEN_ENV_VAR = "CHATBOT_ADMIN_TOKEN"
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+SSE_CONTENT_TYPE = "text/event-stream"
+# Keep proxies (nginx in particular) from buffering the stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def resolve_session_id(data=None, header=None, query=None, cookie=None):
+    """Resolve the caller's session ID from the body, header, query string or cookie.
+
+    Returns (session_id, is_new); a fresh ID is generated when none is supplied.
+    """
+    session_id = (
+        (data.get("session_id") if isinstance(data, dict) else None)
+        or header
+        or query
+        or cookie
+    )
+    if session_id:
+        return str(session_id)[:128], False
+    return os.urandom(16).hex(), True
+
+def parse_flag(value):
+    """Read a boolean option; strings parse as in a query string, so "false" is False"""
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes")
+    return bool(value)
+
+def reasoning_requested(data, args, default=False):
+    """Chain-of-thought output is opt-in via `include_reasoning`/`verbose` in the body or query"""
+    data = data if isinstance(data, dict) else {}
+    for key in ("include_reasoning", "verbose"):
+        if key in data:
+            return parse_flag(data[key])
+        if key in args:
+            return parse_flag(args.get(key, ""))
+    return default
+
+def error_payload(message):
+    return {
+        "error": message,
+        "status": "error"
     }
-}
 
-# --- Context Memory with Enhanced Tracking ---
-class ConversationContext:
-    def __init__(self):
-        self.reset()
+def server_error_payload(error):
+    return {
+        "error": str(error),
+        "status": "error",
+        "timestamp": datetime.now().isoformat()
+    }
+
+def chat_payload(bot, data, session_id, scope=DEFAULT_SCOPE, include_reasoning=False):
+    """Answer one chat message with `bot`; sessions are namespaced by `scope`"""
+    if not data or 'message' not in data:
+        return error_payload("Message is required"), 400
     
-    def reset(self):
-        self.last_intent = None
-        self.intent_history = []
-        self.entity_memory = {}
-        self.conversation_count = 0
-        self.user_preferences = {}
-        self.session_start = datetime.now()
-        self.topics_discussed = set()
+    user_message = admission.clip(data['message'].strip())
     
-    def update(self, intent, entities, user_input):
-        self.last_intent = intent
-        self.intent_history.append({
-            "intent": intent,
-            "timestamp": datetime.now(),
-            "input": user_input
-        })
-        self.conversation_count += 1
-        self.topics_discussed.add(intent)
-        
-        # Update entity memory
-        for entity in entities:
-            if entity not in self.entity_memory:
-                self.entity_memory[entity] = []
-            self.entity_memory[entity].append({
-                "value": entity,
-                "timestamp": datetime.now(),
-                "context": intent
-            })
-
-# Global context instance
-context = ConversationContext()
-
-# --- Enhanced Chatbot Class ---
-class EnhancedChatBot:
-    def __init__(self, profile):
-        self.profile = profile
-        self.responses = self._initialize_responses()
+    if not user_message:
+        return error_payload("Empty message"), 400
     
-    def _initialize_responses(self):
-        return {
-            "greet": [
-                f"Hello! I'm {self.profile['name']}'s AI assistant. How can I help you learn more about him today?",
-                f"Hi there! I'm here to tell you all about {self.profile['name']}. What would you like to know?",
-                f"Welcome! I'm {self.profile['name']}'s digital assistant. Ask me anything about his background and expertise!",
-                f"Greetings! I represent {self.profile['name']}, a passionate {self.profile['role']}. How may I assist you?"
-            ],
-            "name": [
-                f"His name is {self.profile['name']}. He's a passionate {self.profile['role']} with expertise in data analytics and machine learning.",
-                f"I represent {self.profile['name']}, a skilled {self.profile['role']} from {self.profile['location']}.",
-                f"{self.profile['name']} is a dedicated professional who has transitioned from AI/ML to focus more on data analytics."
-            ],
-            "role": [
-                f"{self.profile['name']} works as a {self.profile['role']}. He specializes in transforming raw data into actionable insights for business decisions.",
-                f"He's currently working as a {self.profile['role']}, focusing on {self.profile['recent']}.",
-                f"As a {self.profile['role']}, he combines technical expertise with business acumen to solve complex data problems."
-            ],
-            "skills": [
-                f"{self.profile['name']} has strong technical skills in: {', '.join(self.profile['skills'])}. He's particularly skilled in {', '.join(self.profile['strengths'])}.",
-                f"His technical toolkit includes {', '.join(self.profile['skills'])}, with additional expertise in {', '.join(self.profile['tools'])}.",
-                f"He excels in {', '.join(self.profile['skills'][:3])} and has proven abilities in {', '.join(self.profile['strengths'])}."
-            ],
-            "education": [
-                f"He completed his {self.profile['education']}. His academic background in AI/ML provides a strong foundation for his current analytics work.",
-                f"{self.profile['name']} holds a {self.profile['education']}, which gives him deep technical knowledge in artificial intelligence and machine learning."
-            ],
-            "experience": [
-                f"{self.profile['name']} has {self.profile['experience']}. His background combines both research and industry experience, giving him a unique perspective on data problems.",
-                f"With {self.profile['experience']}, he has worked on various challenging projects spanning different domains.",
-                f"His professional journey includes {self.profile['experience']}, providing him with both theoretical knowledge and practical skills."
-            ],
-            "projects": [
-                f"Some of his notable projects include: {', '.join(self.profile['projects'])}. Each project demonstrates his ability to solve real-world problems using data analysis.",
-                f"His project portfolio showcases diverse applications: {', '.join(self.profile['projects'][:3])}, and more. Would you like to know details about any specific project?",
-                f"He has worked on impactful projects like {', '.join(self.profile['projects'][:2])}, showcasing his versatility in data science applications."
-            ],
-            "interests": [
-                f"He's passionate about {', '.join(self.profile['interests'])}. These interests drive him to continuously learn and improve his analytical skills.",
-                f"{self.profile['name']} enjoys {', '.join(self.profile['interests'])}, which keeps him updated with the latest trends in data science."
-            ],
-            "recent": [
-                f"Currently, {self.profile['recent']}. This shift allows him to focus more on business impact and strategic decision-making.",
-                f"His recent focus is on {self.profile['recent']}, which aligns with industry demand for strong analytical skills."
-            ],
-            "contact": [
-                f"{self.profile['name']} is {self.profile['contact']}. He's always interested in challenging data problems and innovative analytics solutions.",
-                f"You can reach out to him for collaborations - he's {self.profile['contact']}."
-            ],
-            "goals": [
-                f"His career goal is {self.profile['goals']}. He's constantly working on improving his skills and taking on more leadership responsibilities.",
-                f"{self.profile['name']} aims {self.profile['goals']}, focusing on both technical excellence and leadership development."
-            ],
-            "tools": [
-                f"He regularly works with {', '.join(self.profile['tools'])} for development and data analysis tasks.",
-                f"His preferred development environment includes {', '.join(self.profile['tools'])}, ensuring efficient and productive workflows."
-            ],
-            "location": [
-                f"He's based in {self.profile['location']} and is open to both local and remote opportunities.",
-                f"{self.profile['name']} is located in {self.profile['location']} but works with clients globally."
-            ],
-            "certifications": [
-                f"He has earned certifications in {', '.join(self.profile['certifications'])}, validating his expertise in data analysis.",
-                f"His professional credentials include {', '.join(self.profile['certifications'])}, demonstrating his commitment to continuous learning."
-            ],
-            "social": [
-                f"You can find his professional profile on LinkedIn: {self.profile.get('linkedin', 'Available upon request')}",
-                f"Check out his work on GitHub: {self.profile.get('github', 'Available upon request')} and his portfolio: {self.profile.get('portfolio', 'Available upon request')}"
-            ],
-            "bye": [
-                "Thank you for your interest in Anand's profile! Feel free to come back anytime to learn more.",
-                "Goodbye! Don't hesitate to reach out if you want to know more about Anand's work and expertise.",
-                "It was great chatting with you! Come back anytime to learn more about Anand's professional journey."
-            ],
-            "fallback": [
-                "I'd be happy to tell you more about Anand. You can ask about his skills, projects, experience, or current work.",
-                "That's an interesting question! While I might not have specific details on that, I can tell you about Anand's background, skills, or recent projects.",
-                "Let me help you learn more about Anand. Try asking about his technical skills, work experience, or recent projects.",
-                "I'm here to share information about Anand's professional profile. What specific aspect would you like to know about?"
-            ]
-        }
+    # Process message with chatbot
+    result = bot.process_message(user_message, scope + session_id, include_reasoning)
     
-    def detect_intent(self, message):
-        """Advanced intent detection with confidence scoring and entity extraction"""
-        chain_of_thought = []
-        chain_of_thought.append("🔍 Analyzing user input for intent patterns...")
-        
-        normalized_message = message.lower().strip()
-        best_intent = "fallback"
-        max_score = 0
-        matched_patterns = []
-        extracted_entities = []
-        
-        # Intent detection
-        for intent, config in INTENT_RULES.items():
-            score = 0
-            intent_matches = []
-            
-            for pattern in config["patterns"]:
-                if re.search(pattern, normalized_message, re.IGNORECASE):
-                    score += config["weight"]
-                    intent_matches.append(pattern)
-            
-            if score > max_score:
-                max_score = score
-                best_intent = intent
-                matched_patterns = intent_matches
-                extracted_entities = config["entities"]
-        
-        # Calculate confidence
-        confidence = min(max_score * 0.8, 0.95) if max_score > 0 else 0.3
-        
-        chain_of_thought.append(f"🎯 Best match: '{best_intent}' (confidence: {confidence:.0%})")
-        
-        if matched_patterns:
-            chain_of_thought.append(f"📝 Matched {len(matched_patterns)} pattern(s)")
-        
-        if extracted_entities:
-            chain_of_thought.append(f"🏷️ Extracted entities: {', '.join(extracted_entities)}")
-        
-        return {
-            "intent": best_intent,
-            "confidence": confidence,
-            "entities": extracted_entities,
-            "matched_patterns": matched_patterns,
-            "chain_of_thought": chain_of_thought
-        }
+    payload = {
+        "status": "success",
+        "session_id": session_id,
+        "bot_response": result["response"],
+        "intent": result["intent"],
+        "confidence": result["confidence"],
+        "conversation_count": result["conversation_count"]
+    }
+    if include_reasoning:
+        payload.update({
+            "entities": result["entities"],
+            "chain_of_thought": result["chain_of_thought"],
+            "predicted_next": result["predicted_next"],
+            "processing_time": result["processing_time"],
+            "timestamp": datetime.now().isoformat()
+        })
+    return payload, 200
+
+def sse_event(event, data):
+    """Encode one Server-Sent Event with a JSON data line"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+def chat_stream_payload(bot, data, session_id, scope=DEFAULT_SCOPE, include_reasoning=True):
+    """Answer one chat message as a stream of SSE-encoded events.
     
-    def generate_contextual_response(self, intent, message):
-        """Generate contextually aware responses"""
-        chain_of_thought = []
-        chain_of_thought.append("🧠 Analyzing conversation context...")
-        
-        # Get base responses for the intent
-        responses = self.responses.get(intent, self.responses["fallback"])
-        
-        # Context-aware response selection
-        if context.conversation_count > 0:
-            # Avoid repeating recent responses
-            recent_intents = [h["intent"] for h in context.intent_history[-3:]]
-            if intent in recent_intents and len(responses) > 1:
-                chain_of_thought.append("🔄 Selecting varied response to avoid repetition")
-        
-        # Select response
-        selected_response = random.choice(responses)
-        
-        # Add contextual enhancements
-        enhanced_response = selected_response
-        
-        # Add follow-up suggestions based on context
-        if context.conversation_count > 2 and intent not in ["bye", "greet"]:
-            follow_ups = self._get_follow_up_suggestions(intent)
-            if follow_ups:
-                enhanced_response += f"\n\n{random.choice(follow_ups)}"
-        
-        chain_of_thought.append("✨ Applied contextual enhancements")
-        chain_of_thought.append("✅ Response generated successfully!")
-        
-        return enhanced_response, chain_of_thought
+    Returns (events, 200) where events is an iterator of bytes, or
+    (error payload, status) when the request is invalid.
+    """
+    if not data or 'message' not in data:
+        return error_payload("Message is required"), 400
+    user_message = admission.clip(data['message'].strip())
+    if not user_message:
+        return error_payload("Empty message"), 400
     
-    def _get_follow_up_suggestions(self, current_intent):
-        """Get contextual follow-up suggestions"""
-        suggestions = {
-            "skills": ["Would you like to know about his specific projects using these skills?", "Interested in learning about his work experience?"],
-            "projects": ["Would you like to know more about his technical skills?", "Curious about his educational background?"],
-            "experience": ["Want to hear about his notable projects?", "Interested in his future career goals?"],
-            "education": ["Would you like to know about his professional experience?", "Curious about his current projects?"],
-            "recent": ["Want to know about his previous projects?", "Interested in his long-term career goals?"]
-        }
-        return suggestions.get(current_intent, [])
+    def events():
+        try:
+            yield from encode(bot.stream_message(user_message, scope + session_id, include_reasoning))
+        except Exception as e:
+            # Headers are already sent; report the failure in-band
+            yield sse_event("error", server_error_payload(e))
     
-    def process_message(self, message):
-        """Main method to process user message and generate response"""
-        start_time = time.time()
-        
-        # Detect intent and extract information
-        detection_result = self.detect_intent(message)
-        intent = detection_result["intent"]
-        confidence = detection_result["confidence"]
-        entities = detection_result["entities"]
-        chain_of_thought = detection_result["chain_of_thought"]
-        
-        # Generate contextual response
-        chain_of_thought.append("💡 Generating contextual response...")
-        response, additional_thoughts = self.generate_contextual_response(intent, message)
-        chain_of_thought.extend(additional_thoughts)
-        
-        # Update context
-        context.update(intent, entities, message)
-        
-        processing_time = time.time() - start_time
-        chain_of_thought.append(f"⚡ Processing completed in {processing_time:.3f}s")
-        
-        return {
-            "response": response,
-            "intent": intent,
-            "confidence": confidence,
-            "entities": entities,
-            "chain_of_thought": chain_of_thought,
-            "processing_time": processing_time,
-            "conversation_count": context.conversation_count
-        }
-
-# --- Flask Web Application ---
-app = Flask(__name__)
-CORS(app)  # Enable CORS for frontend integration
-
-# Initialize chatbot
-chatbot = EnhancedChatBot(PROFILE)
+    def encode(stream):
+        for event, value in stream:
+            if event == "response":
+                result = value
+                value = {
+                    "status": "success",
+                    "session_id": session_id,
+                    "bot_response": result["response"],
+                    "conversation_count": result["conversation_count"]
+                }
+                if include_reasoning:
+                    value["entities"] = result["entities"]
+                    value["processing_time"] = result["processing_time"]
+            yield sse_event(event, value)
+    return events(), 200
 
-@app.route('/api/chat', methods=['POST'])
-def chat_endpoint():
-    """Main chat endpoint"""
-    try:
-        data = request.get_json()
-        
-        if not data or 'message' not in data:
-            return jsonify({
-                "error": "Message is required",
-                "status": "error"
-            }), 400
-        
-        user_message = data['message'].strip()
-        
-        if not user_message:
-            return jsonify({
-                "error": "Empty message",
-                "status": "error"
-            }), 400
-        
-        # Process message with chatbot
-        result = chatbot.process_message(user_message)
-        
-        return jsonify({
-            "status": "success",
+def batch_payload(bot, data, session_id=None, scope=DEFAULT_SCOPE, include_reasoning=False):
+    """Classify and answer many messages in one request.
+    
+    With a `session_id` the messages are applied to that session in order;
+    without one they are answered against a throwaway context.
+    """
+    messages = data.get('messages') if isinstance(data, dict) else None
+    
+    if not isinstance(messages, list) or not messages:
+        return error_payload("A non-empty 'messages' list is required"), 400
+    
+    if data.get('session_id') is not None and not isinstance(data['session_id'], str):
+        return error_payload("'session_id' must be a string"), 400
+    
+    if len(messages) > MAX_BATCH_SIZE:
+        return error_payload(f"At most {MAX_BATCH_SIZE} messages per batch"), 400
+    
+    for index, message in enumerate(messages):
+        if not isinstance(message, str) or not message.strip():
+            return error_payload(f"Message {index} must be a non-empty string"), 400
+    
+    start_time = time.time()
+    results = bot.process_batch(
+        [admission.clip(message.strip()) for message in messages],
+        session_id=None if session_id is None else scope + session_id,
+        include_reasoning=include_reasoning
+    )
+    
+    items = []
+    for result in results:
+        item = {
             "bot_response": result["response"],
             "intent": result["intent"],
             "confidence": result["confidence"],
             "entities": result["entities"],
-            "chain_of_thought": result["chain_of_thought"],
-            "processing_time": result["processing_time"],
-            "conversation_count": result["conversation_count"],
-            "timestamp": datetime.now().isoformat()
-        })
-        
-    except Exception as e:
-        return jsonify({
-            "error": str(e),
-            "status": "error",
-            "timestamp": datetime.now().isoformat()
-        }), 500
-
-@app.route('/api/profile', methods=['GET'])
-def get_profile():
-    """Get profile information"""
-    return jsonify({
+            "processing_time": result["processing_time"]
+        }
+        if include_reasoning:
+            item["chain_of_thought"] = result["chain_of_thought"]
+        items.append(item)
+    
+    payload = {
         "status": "success",
-        "profile": PROFILE,
+        "count": len(items),
+        "results": items,
+        "processing_time": time.time() - start_time,
         "timestamp": datetime.now().isoformat()
-    })
+    }
+    if session_id is not None:
+        payload["session_id"] = session_id
+    return payload, 200
 
-@app.route('/api/context', methods=['GET'])
-def get_context():
-    """Get current conversation context"""
-    return jsonify({
+def shed_payload(client):
+    """Run admission control for a chat request from `client` (its address).
+
+    Returns None when admitted, and the caller must call admission.release()
+    once the response is sent; otherwise (payload, status, retry_after_seconds).
+    """
+    shed = admission.admit(client)
+    if shed is None:
+        return None
+    status, retry_after = shed
+    message = "Too many requests" if status == 429 else "Server is busy, try again shortly"
+    return error_payload(message), status, max(1, math.ceil(retry_after))
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header value matches the (unquoted) etag"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate.strip('"') == etag:
+            return True
+    return False
+
+def context_payload(bot, session_id, scope=DEFAULT_SCOPE):
+    context = bot.sessions.get(scope + session_id)
+    return {
         "status": "success",
+        "session_id": session_id,
         "context": {
             "conversation_count": context.conversation_count,
             "topics_discussed": list(context.topics_discussed),
@@ -427,97 +331,474 @@ def get_context():
             "session_duration": str(datetime.now() - context.session_start)
         },
         "timestamp": datetime.now().isoformat()
-    })
+    }, 200
 
-@app.route('/api/reset', methods=['POST'])
-def reset_context():
-    """Reset conversation context"""
-    context.reset()
-    return jsonify({
+def reset_payload(bot, session_id, scope=DEFAULT_SCOPE):
+    bot.reset_session(scope + session_id)
+    return {
         "status": "success",
+        "session_id": session_id,
         "message": "Context reset successfully",
         "timestamp": datetime.now().isoformat()
-    })
+    }, 200
+
+def profile_not_found_payload(profile_id):
+    return error_payload(f"Unknown profile '{profile_id}'"), 404
+
+def metrics_text():
+    """Prometheus exposition of stage latencies and cache counters"""
+    return chatbot.metrics.render_prometheus({"intent_cache": chatbot.matcher.cache}) + admission.render_prometheus()
+
+def admin_authorized(token):
+    expected = os.environ.get(ADMIN_TOKEN_ENV_VAR)
+    return bool(expected) and token == expected
+
+def profiling_payload(data):
+    """Switch request sampling on/off: {"sample_rate": 0.01}; {"reset": true} clears stats"""
+    data = data if isinstance(data, dict) else {}
+    if "sample_rate" in data:
+        try:
+            chatbot.profiler.set_rate(data["sample_rate"])
+        except (TypeError, ValueError):
+            return error_payload("'sample_rate' must be a number between 0 and 1"), 400
+    if data.get("reset"):
+        chatbot.profiler.reset()
+    return {
+        "status": "success",
+        "sample_rate": chatbot.profiler.sample_rate,
+        "samples": chatbot.profiler.samples
+    }, 200
 
-@app.route('/api/health', methods=['GET'])
-def health_check():
-    """Health check endpoint"""
-    return jsonify({
+def health_payload():
+    return {
         "status": "healthy",
         "service": "Enhanced Chatbot API",
         "version": "2.0",
+        "intent_cache": chatbot.matcher.cache.stats(),
+        "transcript": chatbot.transcript.stats() if chatbot.transcript is not None else None,
+        "admission": admission.stats(),
         "timestamp": datetime.now().isoformat()
-    })
+    }, 200
 
-# --- Command Line Interface ---
-def console_chat():
-    """Console-based chat interface"""
-    print("🤖 Enhanced Anand Dubey Chatbot")
-    print("=" * 50)
-    print(f"Hello! I can tell you all about {PROFILE['name']}.")
-    print("Type 'bye' to exit, 'reset' to clear context, or 'help' for commands.\n")
+# --- Flask Web Application ---
+def create_app():
+    """Build the Flask app serving the chat API; Flask is only imported here"""
+    from flask import Flask, Response, abort, request, jsonify
+    from flask_cors import CORS
     
+    app = Flask(__name__)
+    # One byte over the limit: Werkzeug cuts a chunked body at MAX_CONTENT_LENGTH instead of refusing it
+    app.config["MAX_CONTENT_LENGTH"] = MAX_BODY_BYTES + 1
+    CORS(app)  # Enable CORS for frontend integration
+
+    @app.before_request
+    def read_body():
+        """Read the body up front, so an oversized one is refused before any handler catches the error"""
+        if len(request.get_data(cache=True)) > MAX_BODY_BYTES:
+            abort(413)
+
+    @app.errorhandler(413)
+    def body_too_large(error):
+        return jsonify(error_payload("Request body too large")), 413
+
+    def get_session_id(data=None):
+        """Resolve the session ID of the current Flask request"""
+        return resolve_session_id(
+            data,
+            request.headers.get(SESSION_HEADER),
+            request.args.get("session_id"),
+            request.cookies.get(SESSION_COOKIE)
+        )
+
+    def with_session_cookie(response, session_id, is_new):
+        """Attach the session cookie to a response for newly created sessions"""
+        if is_new:
+            response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="Lax")
+        return response
+
+    def handle_profile(bot):
+        """Serve the pre-rendered profile JSON with an ETag, answering 304 when unchanged"""
+        tables = bot.tables
+        if request.if_none_match.contains_weak(tables.profile_etag):
+            response = Response(status=304)
+        else:
+            response = Response(tables.profile_json, mimetype="application/json")
+        response.set_etag(tables.profile_etag)
+        return response
+
+    def handle_chat(bot, scope=DEFAULT_SCOPE):
+        try:
+            data = request.get_json()
+            session_id, is_new = get_session_id(data)
+            payload, status = chat_payload(bot, data, session_id, scope, reasoning_requested(data, request.args))
+            return with_session_cookie(jsonify(payload), session_id, is_new and status == 200), status
+        except Exception as e:
+            return jsonify(server_error_payload(e)), 500
+
+    def handle_chat_stream(bot, scope=DEFAULT_SCOPE):
+        try:
+            data = request.get_json()
+            session_id, is_new = get_session_id(data)
+            payload, status = chat_stream_payload(bot, data, session_id, scope, reasoning_requested(data, request.args, True))
+            if status != 200:
+                return jsonify(payload), status
+            response = Response(payload, mimetype=SSE_CONTENT_TYPE, headers=SSE_HEADERS)
+            return with_session_cookie(response, session_id, is_new)
+        except Exception as e:
+            return jsonify(server_error_payload(e)), 500
+
+    def handle_batch(bot, scope=DEFAULT_SCOPE):
+        try:
+            data = request.get_json()
+            # Only a session the caller already has is continued; otherwise the batch is stateless
+            session_id, is_new = get_session_id(data)
+            payload, status = batch_payload(bot, data, None if is_new else session_id, scope,
+                                            reasoning_requested(data, request.args))
+            return jsonify(payload), status
+        except Exception as e:
+            return jsonify(server_error_payload(e)), 500
+
+    def admitted(handle, *args):
+        """Run a chat handler unless admission control sheds the request, then free its in-flight slot"""
+        shed = shed_payload(request.remote_addr)
+        if shed is not None:
+            payload, status, retry_after = shed
+            return jsonify(payload), status, {"Retry-After": str(retry_after)}
+        streamed = False
+        try:
+            response = app.make_response(handle(*args))
+            # An SSE generator keeps working after we return, so it holds the slot until it is closed
+            streamed = response.is_streamed
+            if streamed:
+                response.call_on_close(admission.release)
+            return response
+        finally:
+            if not streamed:
+                admission.release()
+
+    def handle_context(bot, scope=DEFAULT_SCOPE):
+        session_id, is_new = get_session_id()
+        payload, status = context_payload(bot, session_id, scope)
+        return with_session_cookie(jsonify(payload), session_id, is_new), status
+
+    def handle_reset(bot, scope=DEFAULT_SCOPE):
+        session_id, is_new = get_session_id(request.get_json(silent=True))
+        payload, status = reset_payload(bot, session_id, scope)
+        return with_session_cookie(jsonify(payload), session_id, is_new), status
+
+    @app.route('/api/chat', methods=['POST'])
+    def chat_endpoint():
+        """Main chat endpoint"""
+        return admitted(handle_chat, chatbot)
+
+    @app.route('/api/chat/stream', methods=['POST'])
+    def chat_stream_endpoint():
+        """Chat endpoint streaming intent, reasoning steps and response as Server-Sent Events"""
+        return admitted(handle_chat_stream, chatbot)
+
+    @app.route('/api/chat/batch', methods=['POST'])
+    def chat_batch_endpoint():
+        """Classify and answer many messages in one request"""
+        return admitted(handle_batch, chatbot)
+
+    @app.route('/api/profile', methods=['GET'])
+    def get_profile():
+        """Get profile information"""
+        return handle_profile(chatbot)
+
+    @app.route('/api/context', methods=['GET'])
+    def get_context():
+        """Get current conversation context"""
+        return handle_context(chatbot)
+
+    @app.route('/api/reset', methods=['POST'])
+    def reset_context():
+        """Reset conversation context"""
+        return handle_reset(chatbot)
+
+    # --- Per-profile routes ---
+    def profile_not_found(profile_id):
+        payload, status = profile_not_found_payload(profile_id)
+        return jsonify(payload), status
+
+    @app.route('/api/<profile_id>/chat', methods=['POST'])
+    def profile_chat_endpoint(profile_id):
+        """Chat with a specific profile's bot"""
+        bot = profiles.get(profile_id)
+        if bot is None:
+            return profile_not_found(profile_id)
+        return admitted(handle_chat, bot, f"{profile_id}:")
+
+    @app.route('/api/<profile_id>/chat/stream', methods=['POST'])
+    def profile_chat_stream_endpoint(profile_id):
+        """Stream a chat answer from a specific profile's bot"""
+        bot = profiles.get(profile_id)
+        if bot is None:
+            return profile_not_found(profile_id)
+        return admitted(handle_chat_stream, bot, f"{profile_id}:")
+
+    @app.route('/api/<profile_id>/chat/batch', methods=['POST'])
+    def profile_chat_batch_endpoint(profile_id):
+        """Answer many messages with a specific profile's bot"""
+        bot = profiles.get(profile_id)
+        if bot is None:
+            return profile_not_found(profile_id)
+        return admitted(handle_batch, bot, f"{profile_id}:")
+
+    @app.route('/api/<profile_id>/profile', methods=['GET'])
+    def get_profile_by_id(profile_id):
+        """Get a specific profile"""
+        bot = profiles.get(profile_id)
+        if bot is None:
+            return profile_not_found(profile_id)
+        return handle_profile(bot)
+
+    @app.route('/api/<profile_id>/context', methods=['GET'])
+    def get_profile_context(profile_id):
+        """Get the caller's conversation context with a specific profile"""
+        bot = profiles.get(profile_id)
+        if bot is None:
+            return profile_not_found(profile_id)
+        return handle_context(bot, f"{profile_id}:")
+
+    @app.route('/api/<profile_id>/reset', methods=['POST'])
+    def reset_profile_context(profile_id):
+        """Reset the caller's conversation context with a specific profile"""
+        bot = profiles.get(profile_id)
+        if bot is None:
+            return profile_not_found(profile_id)
+        return handle_reset(bot, f"{profile_id}:")
+
+    @app.route('/api/metrics', methods=['GET'])
+    def metrics_endpoint():
+        """Prometheus metrics"""
+        return Response(metrics_text(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+    @app.route('/api/metrics/cprofile', methods=['GET', 'POST'])
+    def cprofile_endpoint():
+        """GET: cProfile report of sampled requests; POST: change the sampling rate"""
+        if not admin_authorized(request.headers.get(ADMIN_TOKEN_HEADER)):
+            return jsonify(error_payload("Forbidden")), 403
+        if request.method == 'GET':
+            return Response(chatbot.profiler.report(), content_type="text/plain; charset=utf-8")
+        payload, status = profiling_payload(request.get_json(silent=True))
+        return jsonify(payload), status
+
+    @app.route('/api/health', methods=['GET'])
+    def health_check():
+        """Health check endpoint"""
+        payload, status = health_payload()
+        return jsonify(payload), status
+    
+    return app
+
+def __getattr__(name):
+    """Create the Flask app on first access, so `from enhanced_chatbot import app` still works"""
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# --- Command Line Interface ---
+CONSOLE_SESSION_ID = "console"
+EXIT_WORDS = ('bye', 'exit', 'quit')
+# Upper bound on lines answered per process_batch call when input is piped
+CONSOLE_BATCH_SIZE = 512
+
+def piped_lines(fd, max_batch=CONSOLE_BATCH_SIZE):
+    """Yield lists of the complete lines available on a piped fd.
+
+    Each read returns whatever the writer has produced so far, so lines are
+    answered in batches as large as the input allows without waiting for more.
+    """
+    pending = b""
+    while True:
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            break
+        *lines, pending = (pending + chunk).split(b"\n")
+        for start in range(0, len(lines), max_batch):
+            yield [line.decode("utf-8", "replace").strip() for line in lines[start:start + max_batch]]
+    if pending.strip():
+        yield [pending.decode("utf-8", "replace").strip()]
+
+def prompted_lines():
+    """Yield one typed line at a time; stops at end of input"""
     while True:
         try:
-            user_input = input("You: ").strip()
-            
-            if not user_input:
-                continue
-                
-            if user_input.lower() == 'help':
-                print("\nAvailable commands:")
-                print("- 'bye' or 'exit': End the conversation")
-                print("- 'reset': Clear conversation context")
-                print("- 'context': Show current conversation context")
-                print("- Ask anything about Anand's profile!\n")
+            yield [input("You: ").strip()]
+        except EOFError:
+            return
+
+def format_console_result(message, result, quiet, as_json):
+    if as_json:
+        record = {
+            "input": message,
+            "response": result["response"],
+            "intent": result["intent"],
+            "confidence": result["confidence"],
+            "entities": result["entities"]
+        }
+        if not quiet:
+            record["chain_of_thought"] = result["chain_of_thought"]
+        return json.dumps(record, ensure_ascii=False) + "\n"
+    if quiet:
+        return f"Bot: {result['response']}\n"
+    thoughts = "".join(f"{i}. {thought}\n" for i, thought in enumerate(result['chain_of_thought'], 1))
+    return (f"\n--- Chain of Thought ---\n{thoughts}Confidence: {result['confidence']:.0%}\n"
+            f"------------------------\nBot: {result['response']}\n\n")
+
+def console_command(command, argument, history, as_json):
+    """Output of a console command (help, reset, context, history)"""
+    if command == 'help':
+        if as_json:
+            return json.dumps({"command": "help", "commands": ["bye", "reset", "context", "history"]}) + "\n"
+        return ("\nAvailable commands:\n"
+                "- 'bye' or 'exit': End the conversation\n"
+                "- 'reset': Clear conversation context\n"
+                "- 'context': Show current conversation context\n"
+                "- 'history [words]': Search the questions asked so far\n"
+                "- Ask anything about Anand's profile!\n\n")
+    if command == 'reset':
+        chatbot.reset_session(CONSOLE_SESSION_ID)
+        if as_json:
+            return json.dumps({"command": "reset"}) + "\n"
+        return "Bot: Conversation context has been reset!\n\n"
+    if command == 'context':
+        context = chatbot.sessions.get(CONSOLE_SESSION_ID)
+        if as_json:
+            return json.dumps({
+                "command": "context",
+                "conversation_count": context.conversation_count,
+                "topics_discussed": sorted(context.topics_discussed),
+                "last_intent": context.last_intent,
+                "session_duration": str(datetime.now() - context.session_start)
+            }) + "\n"
+        return (f"\nConversation Context:\n"
+                f"- Messages exchanged: {context.conversation_count}\n"
+                f"- Topics discussed: {', '.join(context.topics_discussed) if context.topics_discussed else 'None'}\n"
+                f"- Last intent: {context.last_intent}\n"
+                f"- Session duration: {datetime.now() - context.session_start}\n\n")
+    # history
+    matches = history.search(argument)
+    if as_json:
+        return json.dumps({
+            "command": "history",
+            "query": argument,
+            "matches": [{"turn": turn, "question": question, "intent": intent} for turn, question, intent in matches]
+        }, ensure_ascii=False) + "\n"
+    if not matches:
+        return f"No earlier question matches '{argument}'.\n\n" if argument else "No questions asked yet.\n\n"
+    return "".join(f"  {turn}. {question}  [{intent}]\n" for turn, question, intent in matches) + "\n"
+
+def run_console_lines(lines, history, quiet, as_json):
+    """Answer a batch of console lines in order; returns (output, finished).
+
+    Consecutive questions go through process_batch together; commands and the
+    final 'bye' split the batch so everything happens in input order.
+    """
+    out = []
+    questions = []
+
+    def answer():
+        if questions:
+            results = chatbot.process_batch(questions, session_id=CONSOLE_SESSION_ID, include_reasoning=not quiet)
+            for message, result in zip(questions, results):
+                history.add(message, result["intent"])
+                out.append(format_console_result(message, result, quiet, as_json))
+            questions.clear()
+
+    for line in lines:
+        if not line:
+            continue
+        command, _, argument = line.partition(" ")
+        command = command.lower()
+        if line.lower() in ('help', 'reset', 'context') or command == 'history':
+            answer()
+            out.append(console_command(command, argument.strip(), history, as_json))
+        elif line.lower() in EXIT_WORDS:
+            questions.append(line)
+            answer()
+            return out, True
+        else:
+            questions.append(line)
+    answer()
+    return out, False
+
+def console_chat(quiet=False, as_json=False):
+    """Console chat: interactive at a terminal, answered in batches when stdin is piped.
+    
+    --quiet leaves out the chain of thought; --json writes one JSON object per answer.
+    """
+    interactive = sys.stdin.isatty()
+    if interactive and not as_json:
+        print("🤖 Enhanced Anand Dubey Chatbot")
+        print("=" * 50)
+        print(f"Hello! I can tell you all about {chatbot.profile['name']}.")
+        print("Type 'bye' to exit, 'reset' to clear context, 'history' to search your questions, or 'help' for commands.\n")
+    
+    history = QuestionHistory()
+    try:
+        for lines in (prompted_lines() if interactive else piped_lines(sys.stdin.fileno())):
+            try:
+                out, finished = run_console_lines(lines, history, quiet, as_json)
+            except Exception as e:
+                print(f"Error: {e}")
+                print("Please try again.\n")
                 continue
-                
-            if user_input.lower() in ['bye', 'exit', 'quit']:
-                result = chatbot.process_message(user_input)
-                print(f"Bot: {result['response']}")
+            # One write per batch instead of one print per line
+            sys.stdout.write("".join(out))
+            sys.stdout.flush()
+            if finished:
                 break
-                
-            if user_input.lower() == 'reset':
-                context.reset()
-                print("Bot: Conversation context has been reset!\n")
-                continue
-                
-            if user_input.lower() == 'context':
-                print(f"\nConversation Context:")
-                print(f"- Messages exchanged: {context.conversation_count}")
-                print(f"- Topics discussed: {', '.join(context.topics_discussed) if context.topics_discussed else 'None'}")
-                print(f"- Last intent: {context.last_intent}")
-                print(f"- Session duration: {datetime.now() - context.session_start}\n")
-                continue
-            
-            # Process message
-            result = chatbot.process_message(user_input)
-            
-            # Display chain of thought (optional - comment out for cleaner output)
-            print("\n--- Chain of Thought ---")
-            for i, thought in enumerate(result['chain_of_thought'], 1):
-                print(f"{i}. {thought}")
-            print(f"Confidence: {result['confidence']:.0%}")
-            print("------------------------")
-            
-            print(f"Bot: {result['response']}\n")
-            
-        except KeyboardInterrupt:
-            print("\n\nBot: Goodbye! Thanks for chatting!")
-            break
-        except Exception as e:
-            print(f"Error: {e}")
-            print("Please try again.\n")
+    except KeyboardInterrupt:
+        # At the prompt or while a line is being answered
+        print("\n\nBot: Goodbye! Thanks for chatting!")
 
 if __name__ == "__main__":
-    import sys
+    if len(sys.argv) > 2 and sys.argv[1] == 'export-config':
+        # Write the built-in profile and rules as an editable config file
+        export_config(sys.argv[2])
+        print(f"Wrote {sys.argv[2]}; set {CONFIG_ENV_VAR}={sys.argv[2]} to serve from it.")
+        sys.exit(0)
+    
+    if len(sys.argv) > 2 and sys.argv[1] == 'compile-rules':
+        # Precompile the intent rules, e.g. at build time for serverless cold starts
+        start_time = time.perf_counter()
+        save_matcher(IntentMatcher(INTENT_RULES), sys.argv[2])
+        print(f"Compiled rules to {sys.argv[2]} in {(time.perf_counter() - start_time) * 1000:.1f}ms; "
+              f"set {RULES_CACHE_ENV_VAR}={sys.argv[2]} to load them at startup.")
+        sys.exit(0)
+    
+    if len(sys.argv) > 2 and sys.argv[1] == 'replay-transcript':
+        # Rebuild sessions from a transcript log and summarize the most recent ones
+        start_time = time.perf_counter()
+        rebuilt = load_transcript(sys.argv[2])
+        print(f"Rebuilt {len(rebuilt)} session(s) from {sys.argv[2]} in {time.perf_counter() - start_time:.2f}s")
+        for session_id, context, last_seen in rebuilt[-10:]:
+            print(f"  {session_id}: {context.conversation_count} message(s), last {datetime.fromtimestamp(last_seen)}, "
+                  f"recent intents {context.recent_intents()}")
+        sys.exit(0)
+    
+    if len(sys.argv) > 3 and sys.argv[1] == 'learn-transitions':
+        # Count which intent follows which across transcript logs
+        start_time = time.perf_counter()
+        transitions = IntentTransitions.from_transcripts(sys.argv[3:], list(INTENT_RULES) + ["fallback"])
+        transitions.save(sys.argv[2])
+        print(f"Learned {int(transitions.counts.sum())} transition(s) from {len(sys.argv) - 3} transcript(s) "
+              f"in {time.perf_counter() - start_time:.2f}s; set {TRANSITIONS_ENV_VAR}={sys.argv[2]} to use them.")
+        for previous in [None] + transitions.intents:
+            print(f"  after {previous or 'start'}: {', '.join(transitions.predict(previous))}")
+        sys.exit(0)
+    
+    start_config_watcher()
     
     if len(sys.argv) > 1 and sys.argv[1] == 'console':
         # Run console version
-        console_chat()
+        console_chat(quiet='--quiet' in sys.argv[2:], as_json='--json' in sys.argv[2:])
     else:
         # Run Flask web server
         print("🚀 Starting Enhanced Chatbot API Server...")
-        print(f"Profile: {PROFILE['name']} - {PROFILE['role']}")
+        print(f"Profile: {chatbot.profile['name']} - {chatbot.profile['role']}")
         print("=" * 50)
-        app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+        create_app().run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""Localhost load test for the chat API.
+
+Drives POST /api/chat over keep-alive HTTP/1.1 connections from asyncio and
+reports requests/sec and latency percentiles.
+
+    python load_test.py --compare                  # Flask dev server vs ASGI (uvicorn)
+    python load_test.py --prefork 1,2,4            # prefork.py throughput and memory per worker count
+    python load_test.py --url http://127.0.0.1:8000 --concurrency 64 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+MESSAGES = [
+    "Hello there!",
+    "What are your skills and technologies?",
+    "Tell me about your work experience",
+    "Show me your projects and portfolio",
+    "What are you currently working on?",
+    "How can I contact you?",
+]
+
+# --- Client ---
+async def worker(host, port, path, deadline, latencies, errors, worker_id):
+    reader, writer = await asyncio.open_connection(host, port)
+    i = 0
+    try:
+        while time.perf_counter() < deadline:
+            body = json.dumps({
+                "message": MESSAGES[i % len(MESSAGES)],
+                "session_id": f"load-{worker_id}"
+            }).encode("utf-8")
+            request = (
+                f"POST {path} HTTP/1.1\r\n"
+                f"Host: {host}:{port}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: keep-alive\r\n\r\n"
+            ).encode("latin-1") + body
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+
+            status_line = await reader.readline()
+            if not status_line:
+                # Server closed the connection (no keep-alive); reconnect
+                writer.close()
+                reader, writer = await asyncio.open_connection(host, port)
+                continue
+            length = 0
+            close = False
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+                elif name.lower() == "connection" and value.strip().lower() == "close":
+                    close = True
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if b" 200 " not in status_line:
+                errors.append(status_line)
+            if close:
+                writer.close()
+                reader, writer = await asyncio.open_connection(host, port)
+            i += 1
+    finally:
+        writer.close()
+
+async def run_load(url, concurrency, duration):
+    parts = urlsplit(url)
+    path = parts.path.rstrip("/") + "/api/chat" if parts.path not in ("", "/") else "/api/chat"
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        worker(parts.hostname, parts.port or 80, path, deadline, latencies, errors, i)
+        for i in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+def report(label, latencies, errors, elapsed):
+    if not latencies:
+        print(f"{label}: no successful requests")
+        return
+    ordered = sorted(latencies)
+
+    def pct(p):
+        return ordered[min(int(len(ordered) * p), len(ordered) - 1)] * 1000
+
+    print(f"{label}: {len(ordered) / elapsed:,.0f} req/s over {len(ordered)} requests "
+          f"(p50 {pct(0.50):.2f}ms, p99 {pct(0.99):.2f}ms, p99.9 {pct(0.999):.2f}ms, errors {len(errors)})")
+
+# --- Server management for --compare ---
+def wait_until_healthy(url, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url + "/api/health", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become healthy")
+
+def start_server(command):
+    here = os.path.dirname(os.path.abspath(__file__))
+    return subprocess.Popen(command, cwd=here, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def compare(concurrency, duration):
+    servers = [
+        ("Flask (app.run debug)", 5057, [
+            sys.executable, "-c",
+            "from enhanced_chatbot import app; app.run(debug=True, use_reloader=False, host='127.0.0.1', port=5057)"
+        ]),
+        ("ASGI (uvicorn)", 8057, [
+            sys.executable, "-m", "uvicorn", "asgi_app:app", "--host", "127.0.0.1", "--port", "8057",
+            "--log-level", "warning", "--no-access-log"
+        ]),
+    ]
+    for label, port, command in servers:
+        url = f"http://127.0.0.1:{port}"
+        process = start_server(command)
+        try:
+            wait_until_healthy(url)
+            report(label, *asyncio.run(run_load(url, concurrency, duration)))
+        finally:
+            process.terminate()
+            process.wait()
+
+def worker_memory(parent_pid):
+    """Mean (private MB, shared MB) over the parent's child processes, from /proc smaps_rollup (Linux)"""
+    try:
+        with open(f"/proc/{parent_pid}/task/{parent_pid}/children") as f:
+            children = f.read().split()
+    except OSError:
+        return None
+    totals = []
+    for pid in children:
+        fields = {}
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if value.strip().endswith("kB"):
+                    fields[name] = int(value.split()[0])
+        private = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+        shared = fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)
+        totals.append((private / 1024, shared / 1024))
+    if not totals:
+        return None
+    return sum(t[0] for t in totals) / len(totals), sum(t[1] for t in totals) / len(totals)
+
+def prefork_scaling(worker_counts, concurrency, duration, freeze=True):
+    port = 8058
+    url = f"http://127.0.0.1:{port}"
+    for workers in worker_counts:
+        with tempfile.TemporaryDirectory() as directory:
+            command = [sys.executable, "prefork.py", "--host", "127.0.0.1", "--port", str(port),
+                       "--workers", str(workers), "--sessions-db", os.path.join(directory, "sessions.db")]
+            if not freeze:
+                command.append("--no-freeze")
+            process = start_server(command)
+            try:
+                wait_until_healthy(url)
+                label = f"prefork x{workers}{'' if freeze else ' (no gc.freeze)'}"
+                report(label, *asyncio.run(run_load(url, concurrency, duration)))
+                memory = worker_memory(process.pid)
+                if memory is not None:
+                    print(f"  per worker: {memory[0]:.1f}MB private, {memory[1]:.1f}MB shared with the parent")
+            finally:
+                process.terminate()
+                process.wait()
+    print(f"({os.cpu_count()} CPU core(s) available)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--compare", action="store_true", help="start and compare the Flask and ASGI servers")
+    parser.add_argument("--prefork", help="comma-separated worker counts to run prefork.py with, e.g. 1,2,4")
+    parser.add_argument("--no-freeze", action="store_true", help="with --prefork: skip gc.freeze() in the parent")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args.concurrency, args.duration)
+    elif args.prefork:
+        prefork_scaling([int(count) for count in args.prefork.split(",")], args.concurrency, args.duration,
+                        freeze=not args.no_freeze)
+    else:
+        report(args.url, *asyncio.run(run_load(args.url, args.concurrency, args.duration)))
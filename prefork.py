@@ -0,0 +1,130 @@
+"""Pre-fork server for the ASGI app: build the engine once, then fork workers that share it.
+
+The parent imports the app, which compiles the intent rules and renders the
+response tables (from CHATBOT_CONFIG when it is set), then freezes the
+garbage collector and forks. Workers inherit
+that state copy-on-write. Since frozen objects are never scanned by the
+collector, their pages are not dirtied in every worker. Sessions live in a
+shared SQLite file, so any worker can serve any session.
+
+    python prefork.py --workers 4 --port 8000
+    python prefork.py --workers 4 --sessions-db /var/lib/chatbot/sessions.db
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+
+from chatbot_core import SESSIONS_DB_ENV_VAR, SQLiteSessionStore
+
+# --- Workers ---
+def run_worker(sock):
+    """Serve the inherited listening socket until told to stop"""
+    import uvicorn
+    from asgi_app import app
+    from enhanced_chatbot import chatbot, start_config_watcher
+
+    gc.enable()
+    # The parent loaded the config; only the polling thread, which does not survive the fork, starts here
+    start_config_watcher()
+    config = uvicorn.Config(app, log_level="warning", access_log=False, lifespan="off")
+    try:
+        uvicorn.Server(config).run(sockets=[sock])
+    finally:
+        if chatbot.transcript is not None:
+            chatbot.transcript.close()
+
+def spawn(sock):
+    pid = os.fork()
+    if pid == 0:
+        # Drop the parent's handlers; uvicorn installs its own for a graceful shutdown
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        status = 0
+        try:
+            run_worker(sock)
+        except BaseException as e:
+            print(f"⚠️ Worker {os.getpid()} failed: {e}")
+            status = 1
+        finally:
+            # Never fall back into the parent's loop
+            os._exit(status)
+    return pid
+
+# --- Parent ---
+def serve(host, port, workers, freeze=True):
+    if not hasattr(os, "fork"):
+        sys.exit("Pre-fork serving needs os.fork(); use `uvicorn asgi_app:app` on this platform")
+    try:
+        import uvicorn  # noqa: F401
+    except ImportError:
+        sys.exit("uvicorn is required to serve the ASGI app (pip install uvicorn)")
+
+    # No collections while the shared state is built, so it is laid out densely
+    gc.disable()
+    from enhanced_chatbot import chatbot, start_config_watcher
+    if not isinstance(chatbot.sessions, SQLiteSessionStore) or chatbot.sessions.path == ":memory:":
+        sys.exit(f"Workers need a shared session file; set {SESSIONS_DB_ENV_VAR}")
+    # Workers open their own connections; the parent's must not be inherited
+    chatbot.sessions.close()
+    try:
+        # Build the configured profile and rules once, here, so workers share them copy-on-write
+        start_config_watcher(poll=False)
+    except Exception as e:
+        sys.exit(f"Config load failed: {e}")
+    if freeze:
+        gc.collect()
+        gc.freeze()
+
+    sock = socket.create_server((host, port), backlog=2048)
+    sock.set_inheritable(True)
+    # Accepted connections inherit this; without it Nagle + delayed ACK stall
+    # each response split across writes by ~40ms
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    children = set()
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        children.add(spawn(sock))
+    print(f"🚀 Serving {chatbot.profile['name']} on http://{host}:{port} with {workers} worker(s) "
+          f"(sessions in {chatbot.sessions.path})")
+
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            print(f"⚠️ Worker {pid} exited; starting a replacement")
+            children.add(spawn(sock))
+    sock.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--sessions-db", default=os.environ.get(SESSIONS_DB_ENV_VAR, "chatbot_sessions.db"),
+                        help=f"shared SQLite session file (default: ${SESSIONS_DB_ENV_VAR} or ./chatbot_sessions.db)")
+    parser.add_argument("--no-freeze", action="store_true", help="skip gc.freeze() (for comparison)")
+    args = parser.parse_args()
+
+    # Must be set before enhanced_chatbot is imported, which creates the session store
+    os.environ[SESSIONS_DB_ENV_VAR] = args.sessions_db
+    serve(args.host, args.port, args.workers, freeze=not args.no_freeze)